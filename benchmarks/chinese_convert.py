@@ -0,0 +1,100 @@
+"""简繁转换吞吐量基准测试
+
+对比 opencc-python-reimplemented 与 src.utils.chinese_convert.ChineseConverter：
+把语料切成识别结果长度的片段逐条转换，输出每秒字数、逐条结果是否一致，
+以及词典首次加载耗时。默认用 OpenCC 词典中的词条随机拼出繁体语料，
+并以其简体转换结果作为简体语料（测量不需转换时的快速路径）。
+
+用法（在仓库根目录）：
+    python -m benchmarks.chinese_convert
+    python -m benchmarks.chinese_convert --chars 2000000 --conversion t2s
+    python -m benchmarks.chinese_convert --file corpus.txt
+"""
+
+import argparse
+import os
+import random
+import time
+
+COMMON = "的一是了我不在人们有来他这上着个地到大里说就去子得也和那要下看天时过出小么起你都把好还多没为又可家学只以主会样年想生同老中十从自面前头道它后然走很像见两用她国动进成回什边作对开而己些现山民候经发工向事命给长水几义三声于高手知理眼志点心战二问但身方实吃做叫当住听革打呢真全才四已所敌之最光产情路分总条白话东席次亲如被花口放儿常气五第使写军吧文运再果怎定许快明行因别飞外树物活部门无往船望新带队先力完却站代员机更九您每风级跟笑啊孩万少直意夜比阶连车重便斗马哪化太指变社似士者干石满日决百原拿群究各六本思解立河村八难早论吗根共让相研今其书坐接应关信觉步反处记将千找争领或师结块跑谁草越字加脚紧爱等习阵怕月青半火法题建赶位唱海七女任件感准张团屋离色脸片科倒睛利世刚且由送切星导晚表够整认响雪流未场该并底深刻平伟忙提确近亮轻讲农古黑告界拉名呀土清阳照办史改历转画造嘴此治北必服雨穿内识验传业菜爬睡兴形量咱观苦体众通冲合破友度术饭公旁房极南枪读沙岁线野坚空收算至政城劳落钱特围弟胜教热展包歌类渐强数乡呼性音答哥际旧神座章帮啦受系令跳非何牛取入岸敢掉忽种装顶急林停息句区衣般报叶压慢叔背细"
+PUNCTUATION = "，。？！、"
+
+
+def load_dictionary(name):
+    import opencc
+
+    path = os.path.join(os.path.dirname(opencc.__file__), "dictionary", name)
+    with open(path, encoding="utf-8") as f:
+        return [line.split("\t")[0] for line in f if "\t" in line]
+
+
+def synthesize_corpus(chars, seed=0):
+    """由常用字与 OpenCC 词条随机拼成的繁体语料，按行返回识别结果长度的片段"""
+    rng = random.Random(seed)
+    phrases = load_dictionary("TSPhrases.txt")
+    characters = load_dictionary("TSCharacters.txt")
+    lines, total = [], 0
+    while total < chars:
+        pieces = []
+        for _ in range(rng.randint(8, 30)):
+            roll = rng.random()
+            if roll < 0.05:
+                pieces.append(rng.choice(phrases))
+            elif roll < 0.35:
+                pieces.append(rng.choice(characters))
+            else:
+                pieces.append(rng.choice(COMMON))
+            if rng.random() < 0.08:
+                pieces.append(rng.choice(PUNCTUATION))
+        line = "".join(pieces)
+        lines.append(line)
+        total += len(line)
+    return lines
+
+
+def measure(convert, lines):
+    """返回 (每秒字数, 结果)"""
+    start = time.perf_counter()
+    results = [convert(line) for line in lines]
+    elapsed = time.perf_counter() - start
+    return sum(map(len, lines)) / elapsed, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="简繁转换吞吐量基准测试")
+    parser.add_argument("--conversion", default="t2s", help="OpenCC 配置名")
+    parser.add_argument("--chars", type=int, default=200000, help="合成语料的字数")
+    parser.add_argument("--file", help="使用文本文件作为语料（按行切分）")
+    args = parser.parse_args()
+
+    from opencc import OpenCC
+
+    from src.utils.chinese_convert import ChineseConverter
+
+    if args.file:
+        with open(args.file, encoding="utf-8") as f:
+            corpora = {"语料": [line.strip() for line in f if line.strip()]}
+    else:
+        traditional = synthesize_corpus(args.chars)
+        corpora = {"繁体": traditional, "简体": [OpenCC("t2s").convert(line) for line in traditional]}
+
+    start = time.perf_counter()
+    converter = ChineseConverter(args.conversion)
+    converter.convert("預熱")
+    build_ms = (time.perf_counter() - start) * 1000
+    reference = OpenCC(args.conversion)
+
+    print(f"转换: {args.conversion}, 词典加载: {build_ms:.0f}毫秒")
+    print(f"{'语料':<6}{'条数':>8}{'字数':>10}{'OpenCC 字/秒':>16}{'预编译 字/秒':>16}{'加速':>8}{'一致':>8}")
+    for name, lines in corpora.items():
+        baseline, expected = measure(reference.convert, lines)
+        compiled, results = measure(converter.convert, lines)
+        same = sum(a == b for a, b in zip(expected, results)) / len(lines)
+        print(
+            f"{name:<6}{len(lines):>8}{sum(map(len, lines)):>10}{baseline:>16,.0f}"
+            f"{compiled:>16,.0f}{compiled / baseline:>7.1f}x{same:>8.1%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,305 @@
+"""端到端延迟基准测试
+
+在本地模拟服务上运行 VoiceAssistant 从松开按键到文字输入完成的完整路径：
+录音来自 WAV 夹具的回放，键盘输出写入空设备，不需要麦克风、网络或辅助功能权限。
+输出采集、编码、上传、推理、后处理、输入各阶段的 p50/p95/p99 延迟，
+以及松开按键到第一段文字出现的时间（流式输出时即首个 token 的延迟）。
+
+用法（在仓库根目录）：
+    python -m benchmarks.e2e_latency --platform siliconflow --iterations 20
+    python -m benchmarks.e2e_latency --platform groq --asr-delay 0.5 --json result.json
+"""
+
+import argparse
+import enum
+import json
+import os
+import sys
+import threading
+import time
+import types
+from collections import defaultdict
+from contextlib import contextmanager
+
+import numpy as np
+import soundfile as sf
+
+from .fixtures import DEFAULT_SAMPLE_RATE, FixtureSoundDevice, ensure_fixtures
+from .mock_server import MockServer
+
+STAGES = (
+    "capture",
+    "encode",
+    "upload",
+    "inference",
+    "post-processing",
+    "typing",
+    "first-text",
+    "total",
+)
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+RESULT_TIMEOUT = 30  # 等待结果输入完成的最长时间（秒）
+
+
+class NullKeyboard:
+    """键盘输出空设备：只统计按键次数并记录每次粘贴的时间"""
+
+    def __init__(self):
+        self.keystrokes = 0
+        self.pastes = []
+
+    def press(self, key):
+        self.keystrokes += 1
+        if key == "v":
+            self.pastes.append(time.perf_counter())
+
+    def release(self, key):
+        pass
+
+    def type(self, text):
+        self.keystrokes += len(text)
+
+    @contextmanager
+    def pressed(self, *keys):
+        yield
+
+
+class NullClipboard:
+    """剪贴板空设备：只在内存中保存内容"""
+
+    def __init__(self):
+        self.text = ""
+
+    def copy(self, text):
+        self.text = text
+
+    def paste(self):
+        return self.text
+
+
+def install_null_keyboard(clipboard):
+    """本机无法加载 pynput / pyperclip 时（如无图形界面的 CI）以空设备代替"""
+    try:
+        import pynput.keyboard  # noqa: F401
+    except Exception:
+        keyboard = types.ModuleType("pynput.keyboard")
+        keyboard.Controller = NullKeyboard
+        keyboard.Key = enum.Enum(
+            "Key",
+            "alt alt_l alt_r ctrl ctrl_l ctrl_r cmd shift shift_r backspace left right "
+            + " ".join(f"f{i}" for i in range(1, 13)),
+        )
+        keyboard.Listener = None
+        sys.modules["pynput"] = types.ModuleType("pynput")
+        sys.modules["pynput.keyboard"] = keyboard
+    try:
+        import pyperclip  # noqa: F401
+    except Exception:
+        sys.modules["pyperclip"] = clipboard
+    from src.keyboard import listener, output
+
+    listener.pyperclip = clipboard
+    output.pyperclip = clipboard
+
+
+class StageTimer:
+    """给对象的方法套上计时，记录本轮各阶段耗时"""
+
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self.current = {}
+
+    def wrap(self, obj, name, stage):
+        original = getattr(obj, name)
+
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            self.current.setdefault(f"{stage}.start", start)
+            try:
+                return original(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                self.current[stage] = self.current.get(stage, 0.0) + elapsed
+                self.current[f"{stage}.end"] = time.perf_counter()
+
+        setattr(obj, name, timed)
+
+    def reset(self):
+        self.current = {}
+
+    def commit(self, values):
+        for stage, seconds in values.items():
+            self.samples[stage].append(seconds * 1000)
+
+    def report(self):
+        """{阶段: {p50, p95, p99, n}}（毫秒）"""
+        return {
+            stage: {
+                "p50": float(np.percentile(self.samples[stage], 50)),
+                "p95": float(np.percentile(self.samples[stage], 95)),
+                "p99": float(np.percentile(self.samples[stage], 99)),
+                "n": len(self.samples[stage]),
+            }
+            for stage in STAGES
+            if self.samples[stage]
+        }
+
+
+def load_fixtures(paths, sample_rate):
+    """读取夹具并重采样到回放设备的采样率"""
+    from src.audio.resample import PolyphaseResampler
+
+    fixtures = []
+    for path in paths:
+        audio, rate = sf.read(path, dtype="float32", always_2d=True)
+        audio = audio.mean(axis=1)
+        if rate != sample_rate:
+            audio = PolyphaseResampler(rate, sample_rate)(audio).astype(np.float32)
+        fixtures.append((os.path.basename(path), audio))
+    return fixtures
+
+
+def configure_environment(server, args):
+    """指向模拟服务，关闭会掩盖真实延迟的结果缓存"""
+    os.environ.update(
+        {
+            "SERVICE_PLATFORM": args.platform,
+            "SILICONFLOW_BASE_URL": f"{server.base_url}/v1",
+            "SILICONFLOW_API_KEY": "benchmark",
+            "GROQ_BASE_URL": f"{server.base_url}/openai/v1",
+            "GROQ_API_KEY": "benchmark",
+            "TRANSCRIPTION_CACHE": "false",
+            "ASYNC_PIPELINE": "false",
+        }
+    )
+    os.environ.setdefault("TRANSCRIPTIONS_BUTTON", "alt")
+    os.environ.setdefault("TRANSLATIONS_BUTTON", "shift")
+
+
+def run(args):
+    server = MockServer(
+        asr_delay=args.asr_delay,
+        asr_jitter=args.asr_jitter,
+        llm_delay=args.llm_delay,
+        token_interval=args.token_interval,
+    ).start()
+    configure_environment(server, args)
+
+    device = FixtureSoundDevice(args.sample_rate, args.speed)
+    device.install()
+    keyboard, clipboard = NullKeyboard(), NullClipboard()
+    install_null_keyboard(clipboard)
+
+    from main import VoiceAssistant, create_processor
+    from src.utils.tracing import tracer
+
+    assistant = VoiceAssistant(create_processor(args.platform))
+    assistant.keyboard_manager.keyboard = keyboard
+    assistant.keyboard_manager.output.keyboard = keyboard
+    recorder = assistant.audio_recorder
+    recorder.min_record_duration = 0  # 快速回放时录音的墙钟时长会很短
+
+    timer = StageTimer()
+    timer.wrap(recorder, "stop_recording", "stop")
+    timer.wrap(recorder.encoder, "encode", "encode")
+    timer.wrap(assistant.audio_processor, "post_process", "post-processing")
+    # 结果由键盘状态机线程输入，等输入完成后再统计本轮
+    typed = threading.Event()
+    timer.wrap(assistant.keyboard_manager, "_type_result", "typing")
+    type_result = assistant.keyboard_manager._type_result
+
+    def type_and_notify(*args):
+        try:
+            return type_result(*args)
+        finally:
+            typed.set()
+
+    assistant.keyboard_manager._type_result = type_and_notify
+    if not assistant.streaming_upload:
+        timer.wrap(assistant.audio_processor, "transcribe", "request")
+
+    stop = (
+        assistant.stop_translation_recording
+        if args.mode == "translations"
+        else assistant.stop_transcription_recording
+    )
+    fixtures = load_fixtures(ensure_fixtures(args.fixtures), args.sample_rate)
+    for i in range(args.iterations):
+        name, audio = fixtures[i % len(fixtures)]
+        timer.reset()
+        typed.clear()
+        keyboard.pastes.clear()
+        device.play(audio)
+        # 按键由基准测试模拟，这里补上键盘监听器中的追踪事件（配置了 TRACE_SINK 时生效）
+        tracer.begin(mode=args.mode, fixture=name)
+        tracer.event("key_threshold")
+        assistant.start_transcription_recording()
+        device.finished.wait()
+        released = time.perf_counter()
+        tracer.event("key_release")
+        stop()
+        typed.wait(RESULT_TIMEOUT)
+
+        stages = timer.current
+        request = server.last_request("/audio/")
+        if "typing" not in stages or request is None or request["received"] < released - 60:
+            print(f"第 {i + 1} 轮 ({name}) 未得到结果，跳过")
+            continue
+        # 未启用边录边传时请求在 transcribe() 中发出；边录边传时最后一块在松开按键后发出
+        request_start = stages.get("request.start", stages["stop.end"])
+        timer.commit(
+            {
+                "capture": stages["stop"] - stages.get("encode", 0.0),
+                "encode": stages.get("encode", 0.0),
+                "upload": request["body_done"] - request_start,
+                "inference": stages["post-processing.start"] - request["body_done"],
+                "post-processing": stages["post-processing"],
+                "typing": stages["typing"],
+                "first-text": next(
+                    t for t in keyboard.pastes if t >= stages["typing.start"]
+                )
+                - released,
+                "total": stages["typing.end"] - released,
+            }
+        )
+
+    server.stop()
+    return timer.report()
+
+
+def print_report(report, args):
+    print(
+        f"\n平台: {args.platform}, 模式: {args.mode}, 轮数: {args.iterations}, "
+        f"转录延迟: {args.asr_delay}s(+{args.asr_jitter}s), 对话延迟: {args.llm_delay}s"
+    )
+    print(f"{'阶段':<16}{'p50':>10}{'p95':>10}{'p99':>10}   (毫秒)")
+    for stage, values in report.items():
+        print(
+            f"{stage:<16}{values['p50']:>10.1f}{values['p95']:>10.1f}{values['p99']:>10.1f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="端到端延迟基准测试")
+    parser.add_argument("--platform", default="siliconflow", choices=("siliconflow", "groq"))
+    parser.add_argument("--mode", default="transcriptions", choices=("transcriptions", "translations"))
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--fixtures", default=FIXTURE_DIR, help="WAV 夹具目录，为空时生成合成音频")
+    parser.add_argument("--sample-rate", type=int, default=DEFAULT_SAMPLE_RATE, help="回放设备采样率")
+    parser.add_argument("--speed", type=float, default=20.0, help="回放速度倍数")
+    parser.add_argument("--asr-delay", type=float, default=0.3, help="模拟转录延迟（秒）")
+    parser.add_argument("--asr-jitter", type=float, default=0.1, help="模拟转录随机延迟上限（秒）")
+    parser.add_argument("--llm-delay", type=float, default=0.2, help="模拟对话接口延迟（秒）")
+    parser.add_argument("--token-interval", type=float, default=0.02, help="模拟流式输出 token 间隔（秒）")
+    parser.add_argument("--json", help="把结果写入 JSON 文件")
+    args = parser.parse_args()
+
+    report = run(args)
+    print_report(report, args)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "stages": report}, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""基准测试用的音频夹具与回放输入设备
+
+没有录音素材时生成类语音的合成音频（带基频与谐波的音节，中间穿插停顿）；
+FixtureSoundDevice 以 sounddevice 的接口回放这些音频，录音器无需真实麦克风。
+"""
+
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+import soundfile as sf
+
+DEFAULT_DURATIONS = (2, 5, 10, 30)  # 生成的夹具时长（秒）
+DEFAULT_SAMPLE_RATE = 48000  # 模拟常见麦克风的采样率
+
+
+def synthesize_speech(seconds, sample_rate=DEFAULT_SAMPLE_RATE, seed=0):
+    """生成类语音的合成音频（float32，单声道）"""
+    rng = np.random.default_rng(seed)
+    total = int(seconds * sample_rate)
+    audio = rng.normal(0, 0.002, total).astype(np.float32)  # 底噪
+    pos = int(0.3 * sample_rate)
+    while pos < total - int(0.3 * sample_rate):
+        # 一个音节：随机基频加三个谐波，汉宁窗包络
+        length = int(rng.uniform(0.15, 0.3) * sample_rate)
+        length = min(length, total - pos)
+        t = np.arange(length) / sample_rate
+        f0 = rng.uniform(100, 220)
+        syllable = sum(np.sin(2 * np.pi * f0 * k * t) / k for k in range(1, 4))
+        audio[pos : pos + length] += 0.2 * np.hanning(length) * syllable
+        pos += length
+        # 音节间隔，偶尔出现较长的停顿
+        gap = 0.6 if rng.random() < 0.1 else 0.05
+        pos += int(rng.uniform(gap / 2, gap) * sample_rate)
+    return np.clip(audio, -1.0, 1.0)
+
+
+def ensure_fixtures(directory, durations=DEFAULT_DURATIONS, sample_rate=DEFAULT_SAMPLE_RATE):
+    """目录中没有 WAV 文件时生成合成夹具
+
+    Returns:
+        list: WAV 文件路径（按文件名排序）
+    """
+    os.makedirs(directory, exist_ok=True)
+    paths = sorted(
+        os.path.join(directory, name)
+        for name in os.listdir(directory)
+        if name.lower().endswith(".wav")
+    )
+    if paths:
+        return paths
+    for i, seconds in enumerate(durations):
+        path = os.path.join(directory, f"synthetic_{seconds:02d}s.wav")
+        sf.write(path, synthesize_speech(seconds, sample_rate, seed=i), sample_rate)
+        paths.append(path)
+    return paths
+
+
+class FixtureInputStream:
+    """模仿 sounddevice.InputStream：在后台线程中把设备当前的音频分块送入回调"""
+
+    BLOCK_MS = 10
+
+    def __init__(self, source, samplerate, channels=1, callback=None, **kwargs):
+        self.source = source
+        self.samplerate = samplerate
+        self.channels = channels
+        self.callback = callback
+        self.blocksize = int(samplerate * self.BLOCK_MS / 1000)
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        interval = self.BLOCK_MS / 1000 / self.source.speed
+        while self._running:
+            block = self.source.next_block(self.blocksize, self.channels)
+            self.callback(block, len(block), None, None)
+            time.sleep(interval)
+
+    def stop(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join()
+
+    def close(self):
+        self._running = False
+
+
+class FixtureSoundDevice:
+    """以 sounddevice 模块的接口提供回放设备
+
+    play() 设置下一段要“录制”的音频，输入流从头开始回放，回放完毕后输出静音
+    并设置 finished 事件。speed 为回放速度倍数，大于 1 时快于实时。
+    """
+
+    def __init__(self, sample_rate=DEFAULT_SAMPLE_RATE, speed=20.0):
+        self.sample_rate = sample_rate
+        self.speed = speed
+        self.finished = threading.Event()
+        self.finished.set()
+        self._audio = np.zeros(0, dtype=np.float32)
+        self._pos = 0
+        self._lock = threading.Lock()
+
+    def play(self, audio):
+        with self._lock:
+            self._audio = audio.astype(np.float32)
+            self._pos = 0
+            self.finished.clear()
+
+    def next_block(self, frames, channels):
+        with self._lock:
+            block = self._audio[self._pos : self._pos + frames]
+            self._pos += len(block)
+            if self._pos >= len(self._audio):
+                self.finished.set()
+        block = np.pad(block, (0, frames - len(block)))
+        return np.repeat(block[:, None], channels, axis=1)
+
+    def InputStream(self, samplerate, channels=1, callback=None, **kwargs):
+        return FixtureInputStream(self, samplerate, channels, callback, **kwargs)
+
+    def query_devices(self, device=None, kind=None):
+        info = {
+            "name": "基准测试回放设备",
+            "max_input_channels": 1,
+            "default_samplerate": float(self.sample_rate),
+        }
+        return info if kind == "input" else [info]
+
+    def install(self):
+        """替换录音器使用的 sounddevice；本机无法加载 PortAudio 时也能导入录音模块"""
+        try:
+            import sounddevice  # noqa: F401
+        except (ImportError, OSError):
+            sys.modules["sounddevice"] = self
+        from src.audio import devices, recorder
+
+        devices.sd = self
+        recorder.sd = self
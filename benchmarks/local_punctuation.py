@@ -0,0 +1,168 @@
+"""本地标点基准测试
+
+用语料 fixtures/punctuation.jsonl（原始识别文本 + 模型添加标点后的参考结果）评估
+LocalPunctuator：每条耗时的 p50/p99、在当前阈值下本地处理的覆盖率、
+本地结果与参考结果的完全一致率和标点 F1。加 --live 时同时调用模型
+（SymbolProcessor.add_symbol）对比耗时，并以模型的实时输出为参考再评估一次本地结果。
+
+用法（在仓库根目录）：
+    python -m benchmarks.local_punctuation
+    python -m benchmarks.local_punctuation --min-confidence 0.5 --verbose
+    python -m benchmarks.local_punctuation --live
+"""
+
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+CORPUS = os.path.join(os.path.dirname(__file__), "fixtures", "punctuation.jsonl")
+
+
+def load_corpus(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def punctuation_marks(text, punctuation):
+    """文本中各标点的 (去掉标点后的位置, 标点) 集合"""
+    marks = set()
+    position = 0
+    for char in text:
+        if char in punctuation:
+            marks.add((position, char))
+        elif not char.isspace():
+            position += 1
+    return marks
+
+
+def f1(predicted, reference):
+    if not predicted and not reference:
+        return 1.0
+    hits = len(predicted & reference)
+    if hits == 0:
+        return 0.0
+    precision = hits / len(predicted)
+    recall = hits / len(reference)
+    return 2 * precision * recall / (precision + recall)
+
+
+def percentiles(samples):
+    return float(np.percentile(samples, 50)), float(np.percentile(samples, 99))
+
+
+def score(pairs, punctuation):
+    """[(本地结果, 参考结果), ...] 的完全一致条数与平均标点 F1"""
+    exact = sum(result == reference for result, reference in pairs)
+    scores = [
+        f1(
+            punctuation_marks(result, punctuation),
+            punctuation_marks(reference, punctuation),
+        )
+        for result, reference in pairs
+    ]
+    return exact, float(np.mean(scores)) if scores else 0.0
+
+
+def run(args):
+    from src.llm.local_punctuation import LocalPunctuator
+
+    punctuator = LocalPunctuator()
+    if args.max_chars is not None:
+        punctuator.max_chars = args.max_chars
+    if args.min_confidence is not None:
+        punctuator.min_confidence = args.min_confidence
+
+    corpus = load_corpus(args.corpus)
+    latencies = []
+    covered = []  # (原文, 本地结果, 参考结果)
+    declined = 0
+    for item in corpus:
+        text, reference = item["text"], item["reference"]
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            result, confidence = punctuator.punctuate(text)
+            latencies.append((time.perf_counter() - start) * 1000)
+        if len(text) > punctuator.max_chars or confidence < punctuator.min_confidence:
+            declined += 1
+            if args.verbose:
+                print(f"  模型  {confidence:.2f}  {text}")
+            continue
+        covered.append((text, result, reference))
+        if args.verbose:
+            flag = "=" if result == reference else "≠"
+            print(f"  本地{flag}  {confidence:.2f}  {result}  (参考: {reference})")
+
+    exact, mean_f1 = score(
+        [(result, reference) for _, result, reference in covered],
+        punctuator.PUNCTUATION,
+    )
+    p50, p99 = percentiles(latencies)
+    print(
+        f"\n语料: {len(corpus)} 条, 阈值: 最大 {punctuator.max_chars} 字 / "
+        f"置信度 {punctuator.min_confidence}"
+    )
+    print(f"本地耗时: p50 {p50:.3f}毫秒, p99 {p99:.3f}毫秒")
+    print(f"本地覆盖: {len(covered)}/{len(corpus)} ({len(covered) / len(corpus):.0%}), 交给模型 {declined} 条")
+    if covered:
+        print(f"完全一致: {exact}/{len(covered)} ({exact / len(covered):.0%})")
+        print(f"标点 F1: {mean_f1:.3f}")
+
+    if args.live:
+        run_live(corpus, covered, punctuator.PUNCTUATION, args.verbose)
+
+
+def run_live(corpus, covered, punctuation, verbose=False):
+    """调用模型添加标点，对比耗时，并以模型输出为参考评估本地结果
+
+    需要 .env 中的 GROQ_API_KEY / GROQ_BASE_URL / GROQ_ADD_SYMBOL_MODEL 配置。
+    """
+    from dotenv import load_dotenv
+
+    from src.llm.symbol import SymbolProcessor
+
+    load_dotenv()
+    processor = SymbolProcessor()
+    latencies = []
+    live = {}  # 原文 -> 模型输出
+    failed = 0
+    for item in corpus:
+        start = time.perf_counter()
+        output = processor.add_symbol(item["text"])
+        latencies.append((time.perf_counter() - start) * 1000)
+        if isinstance(output, tuple):  # 调用失败时返回 (原文, 异常)
+            failed += 1
+            continue
+        live[item["text"]] = output.strip()
+    p50, p99 = percentiles(latencies)
+    print(f"模型耗时: p50 {p50:.0f}毫秒, p99 {p99:.0f}毫秒")
+    if failed:
+        print(f"模型调用失败: {failed} 条，不参与评估")
+
+    pairs = [(result, live[text]) for text, result, _ in covered if text in live]
+    if not pairs:
+        return
+    if verbose:
+        for result, reference in pairs:
+            flag = "=" if result == reference else "≠"
+            print(f"  本地{flag}模型  {result}  (模型: {reference})")
+    exact, mean_f1 = score(pairs, punctuation)
+    print(f"与模型完全一致: {exact}/{len(pairs)} ({exact / len(pairs):.0%})")
+    print(f"相对模型的标点 F1: {mean_f1:.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地标点基准测试")
+    parser.add_argument("--corpus", default=CORPUS, help="JSONL 语料，每行 {text, reference}")
+    parser.add_argument("--max-chars", type=int, help="覆盖 LOCAL_PUNCTUATION_MAX_CHARS")
+    parser.add_argument("--min-confidence", type=float, help="覆盖 LOCAL_PUNCTUATION_MIN_CONFIDENCE")
+    parser.add_argument("--repeat", type=int, default=100, help="每条重复计时的次数")
+    parser.add_argument("--verbose", action="store_true", help="逐条输出结果")
+    parser.add_argument("--live", action="store_true", help="同时调用模型，对比耗时并以模型输出为参考评估")
+    run(parser.parse_args())
+
+
+if __name__ == "__main__":
+    main()
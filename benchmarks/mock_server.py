@@ -0,0 +1,230 @@
+"""本地模拟转录服务
+
+模拟硅基流动的 /v1/audio/transcriptions 与 Groq（OpenAI 兼容）的
+/openai/v1/audio/{transcriptions,translations}、/chat/completions 接口，
+按配置的延迟返回固定文本，供端到端延迟基准测试使用。
+
+单独运行：
+    python -m benchmarks.mock_server --port 8765 --asr-delay 0.3
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class MockServer:
+    """在后台线程中运行的模拟服务，记录每个请求的接收与响应时间"""
+
+    TEXT = "这是一段用于基准测试的语音转录结果"
+    STREAM_CHUNK_CHARS = 2  # 流式输出时每块的字符数，近似一个 token
+
+    def __init__(
+        self,
+        host="127.0.0.1",
+        port=0,
+        asr_delay=0.3,
+        asr_jitter=0.1,
+        llm_delay=0.2,
+        token_interval=0.02,
+    ):
+        """
+        Args:
+            host: 监听地址
+            port: 监听端口，0 表示随机分配
+            asr_delay: 转录接口的基础延迟（秒）
+            asr_jitter: 转录接口额外的随机延迟上限（秒）
+            llm_delay: 对话接口的延迟（秒），流式输出时为首个 token 的延迟
+            token_interval: 流式输出时相邻 token 的间隔（秒）
+        """
+        self.asr_delay = asr_delay
+        self.asr_jitter = asr_jitter
+        self.llm_delay = llm_delay
+        self.token_interval = token_interval
+        self.requests = []  # [{path, received, body_done, responded, bytes}, ...]
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def last_request(self, path_fragment):
+        """最近一次路径包含 path_fragment 的请求记录"""
+        with self._lock:
+            for record in reversed(self.requests):
+                if path_fragment in record["path"]:
+                    return record
+        return None
+
+    def _record(self, record):
+        with self._lock:
+            self.requests.append(record)
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def _read_body(self):
+                if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+                    chunks = []
+                    while True:
+                        size = int(self.rfile.readline().split(b";")[0], 16)
+                        if size == 0:
+                            self.rfile.readline()
+                            break
+                        chunks.append(self.rfile.read(size))
+                        self.rfile.readline()
+                    return b"".join(chunks)
+                return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+            def _send(self, body, content_type):
+                data = body.encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _completion(self, content):
+                return {
+                    "id": "mock",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": "mock",
+                    "choices": [
+                        {
+                            "index": 0,
+                            "message": {"role": "assistant", "content": content},
+                            "finish_reason": "stop",
+                        }
+                    ],
+                }
+
+            def _send_stream(self, content):
+                """以 SSE 分块输出对话结果，模拟逐 token 生成"""
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                size = server.STREAM_CHUNK_CHARS
+                pieces = [content[i : i + size] for i in range(0, len(content), size)]
+                for i, piece in enumerate(pieces + [None]):
+                    if i:
+                        time.sleep(server.token_interval)
+                    delta = {"content": piece} if piece is not None else {}
+                    event = {
+                        "id": "mock",
+                        "object": "chat.completion.chunk",
+                        "created": int(time.time()),
+                        "model": "mock",
+                        "choices": [
+                            {
+                                "index": 0,
+                                "delta": delta,
+                                "finish_reason": None if piece is not None else "stop",
+                            }
+                        ],
+                    }
+                    self._write_chunk(f"data: {json.dumps(event)}\n\n".encode())
+                self._write_chunk(b"data: [DONE]\n\n")
+                self.wfile.write(b"0\r\n\r\n")
+
+            def _write_chunk(self, data):
+                self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                self.wfile.flush()
+
+            def do_HEAD(self):
+                self.send_response(200)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def do_GET(self):
+                self._send(json.dumps({"data": []}), "application/json")
+
+            def do_POST(self):
+                record = {"path": self.path, "received": time.perf_counter()}
+                body = self._read_body()
+                record["body_done"] = time.perf_counter()
+                record["bytes"] = len(body)
+
+                if "/audio/" in self.path:
+                    time.sleep(server.asr_delay + random.uniform(0, server.asr_jitter))
+                    if b'name="response_format"\r\n\r\ntext' in body:
+                        self._send(server.TEXT, "text/plain; charset=utf-8")
+                    else:
+                        self._send(json.dumps({"text": server.TEXT}), "application/json")
+                elif self.path.endswith("/chat/completions"):
+                    time.sleep(server.llm_delay)
+                    payload = json.loads(body)
+                    messages = payload.get("messages", [])
+                    content = messages[-1]["content"] if messages else ""
+                    if payload.get("response_format", {}).get("type") == "json_object":
+                        content = json.dumps({"text": content}, ensure_ascii=False)
+                    if payload.get("stream"):
+                        self._send_stream(content)
+                    else:
+                        # 非流式响应要等全部 token 生成完毕
+                        pieces = -(-len(content) // server.STREAM_CHUNK_CHARS)
+                        time.sleep(server.token_interval * max(pieces - 1, 0))
+                        self._send(json.dumps(self._completion(content)), "application/json")
+                else:
+                    self.send_response(404)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                record["responded"] = time.perf_counter()
+                server._record(record)
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地模拟转录服务")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--asr-delay", type=float, default=0.3, help="转录延迟（秒）")
+    parser.add_argument("--asr-jitter", type=float, default=0.1, help="转录随机延迟上限（秒）")
+    parser.add_argument("--llm-delay", type=float, default=0.2, help="对话接口延迟（秒）")
+    parser.add_argument("--token-interval", type=float, default=0.02, help="流式输出 token 间隔（秒）")
+    args = parser.parse_args()
+
+    server = MockServer(
+        args.host,
+        args.port,
+        args.asr_delay,
+        args.asr_jitter,
+        args.llm_delay,
+        args.token_interval,
+    ).start()
+    print(f"模拟服务已启动: {server.base_url}")
+    print(f"  SILICONFLOW_BASE_URL={server.base_url}/v1")
+    print(f"  GROQ_BASE_URL={server.base_url}/openai/v1")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 import os
 import sys
+from collections import deque
 
 from dotenv import load_dotenv
 
@@ -7,8 +8,13 @@ load_dotenv()
 
 from src.audio.recorder import AudioRecorder
 from src.keyboard.listener import KeyboardManager, check_accessibility_permissions
+from src.transcription.hedged import HedgedProcessor
+from src.transcription.longform import LongFormProcessor
+from src.transcription.pipeline import TranscriptionPipeline
+from src.transcription.router import AdaptiveRouter
 from src.transcription.whisper import WhisperProcessor
 from src.utils.logger import logger
+from src.utils.tracing import tracer
 from src.transcription.senseVoiceSmall import SenseVoiceSmallProcessor
 
 
@@ -30,6 +36,18 @@ class VoiceAssistant:
     def __init__(self, audio_processor):
         self.audio_recorder = AudioRecorder()
         self.audio_processor = audio_processor
+        # 边录边传：仅在处理器支持时启用
+        self.streaming_upload = os.getenv(
+            "STREAMING_UPLOAD", "false"
+        ).lower() == "true" and getattr(audio_processor, "supports_streaming", False)
+        self.upload = None
+        # 异步流水线：录音结束后立即返回，转录并发进行，结果按录音顺序输出
+        self.pipeline = (
+            TranscriptionPipeline(on_result=self._deliver_result)
+            if os.getenv("ASYNC_PIPELINE", "false").lower() == "true"
+            else None
+        )
+        self._traces = deque()  # 待输出录音的追踪，与结果的输出顺序一致
         self.keyboard_manager = KeyboardManager(
             on_record_start=self.start_transcription_recording,
             on_record_stop=self.stop_transcription_recording,
@@ -38,46 +56,74 @@ class VoiceAssistant:
             on_reset_state=self.reset_state,
         )
 
-    def start_transcription_recording(self):
-        """开始录音（转录模式）"""
-        self.audio_recorder.start_recording()
+    def _start_recording(self):
+        """开始录音，启用边录边传时同步开始上传"""
+        if not self.streaming_upload:
+            self.audio_recorder.start_recording()
+            return
+        self.upload = self.audio_processor.create_stream_upload()
+        self.audio_recorder.start_recording(on_chunk=self.upload.feed)
+        self.upload.start(
+            self.audio_recorder.sample_rate, self.audio_recorder.target_sample_rate
+        )
 
-    def stop_transcription_recording(self):
-        """停止录音并处理（转录模式）"""
-        audio = self.audio_recorder.stop_recording()
+    def _stop_recording(self, mode):
+        """停止录音并处理"""
+        upload, self.upload = self.upload, None
+        # 边录边传时完整录音只在上传失败回退时才需要，推迟编码
+        audio = self.audio_recorder.stop_recording(encode=upload is None)
+        trace = tracer.detach()
         if audio == "TOO_SHORT":
             logger.warning("录音时长太短，状态将重置")
+            if upload:
+                upload.cancel()
+            tracer.finish(trace, status="too_short")
             self.keyboard_manager.reset_state()
         elif audio:
-            result = self.audio_processor.process_audio(
-                audio, mode="transcriptions", prompt=""
-            )
-            # 解构返回值
-            text, error = result if isinstance(result, tuple) else (result, None)
-            self.keyboard_manager.type_text(text, error)
+            self._traces.append(trace)
+            if self.pipeline:
+                self.pipeline.submit(self._process, upload, audio, mode, trace)
+            else:
+                self._deliver_result(self._process(upload, audio, mode, trace))
         else:
             logger.error("没有录音数据，状态将重置")
+            if upload:
+                upload.cancel()
+            tracer.finish(trace, status="no_audio")
             self.keyboard_manager.reset_state()
 
+    def _process(self, upload, audio, mode, trace=None):
+        """转录录音，返回 (文本, 错误信息)"""
+        with tracer.activate(trace):
+            if upload:
+                return self.audio_processor.process_stream(
+                    upload, audio, mode=mode, prompt=""
+                )
+            return self.audio_processor.process_audio(audio, mode=mode, prompt="")
+
+    def _deliver_result(self, result):
+        """输入转录结果；键盘管理器在录音结束后按顺序输入，不与状态提示交错"""
+        trace = self._traces.popleft() if self._traces else None
+        # 解构返回值
+        text, error = result if isinstance(result, tuple) else (result, None)
+        # 追踪在键盘状态机记录 idle 事件后结束
+        self.keyboard_manager.type_text(text, error, trace)
+
+    def start_transcription_recording(self):
+        """开始录音（转录模式）"""
+        self._start_recording()
+
+    def stop_transcription_recording(self):
+        """停止录音并处理（转录模式）"""
+        self._stop_recording("transcriptions")
+
     def start_translation_recording(self):
         """开始录音（翻译模式）"""
-        self.audio_recorder.start_recording()
+        self._start_recording()
 
     def stop_translation_recording(self):
         """停止录音并处理（翻译模式）"""
-        audio = self.audio_recorder.stop_recording()
-        if audio == "TOO_SHORT":
-            logger.warning("录音时长太短，状态将重置")
-            self.keyboard_manager.reset_state()
-        elif audio:
-            result = self.audio_processor.process_audio(
-                audio, mode="translations", prompt=""
-            )
-            text, error = result if isinstance(result, tuple) else (result, None)
-            self.keyboard_manager.type_text(text, error)
-        else:
-            logger.error("没有录音数据，状态将重置")
-            self.keyboard_manager.reset_state()
+        self._stop_recording("translations")
 
     def reset_state(self):
         """重置状态"""
@@ -89,15 +135,38 @@ class VoiceAssistant:
         self.keyboard_manager.start_listening()
 
 
-def main():
-    # 判断是 Whisper 还是 SiliconFlow
-    service_platform = os.getenv("SERVICE_PLATFORM", "siliconflow")
+def create_processor(service_platform):
+    """按平台名称创建转录处理器"""
     if service_platform == "groq":
-        audio_processor = WhisperProcessor()
+        return WhisperProcessor(service_platform)
     elif service_platform == "siliconflow":
-        audio_processor = SenseVoiceSmallProcessor()
+        return SenseVoiceSmallProcessor()
     else:
         raise ValueError(f"无效的服务平台: {service_platform}")
+
+
+def main():
+    # 判断是 Whisper 还是 SiliconFlow
+    service_platform = os.getenv("SERVICE_PLATFORM", "siliconflow")
+    if service_platform == "auto":
+        # 自适应路由：每段录音交给预计最快的平台
+        audio_processor = AdaptiveRouter(
+            {
+                platform: create_processor(platform)
+                for platform in os.getenv("ROUTER_PLATFORMS", "siliconflow,groq").split(",")
+            }
+        )
+    else:
+        audio_processor = create_processor(service_platform)
+    # 对冲请求：主平台迟迟不返回时向备用平台再发一份
+    secondary_platform = os.getenv("HEDGE_SECONDARY_PLATFORM")
+    if secondary_platform:
+        audio_processor = HedgedProcessor(
+            audio_processor, create_processor(secondary_platform)
+        )
+    # 长录音分段并行转录
+    if os.getenv("LONGFORM", "false").lower() == "true":
+        audio_processor = LongFormProcessor(audio_processor)
     try:
         assistant = VoiceAssistant(audio_processor)
         assistant.run()
@@ -1,10 +1,12 @@
 import tkinter as tk
 from tkinter import BooleanVar, StringVar, ttk, scrolledtext
 import os
+import queue
 from tkinter import messagebox
 from dotenv import load_dotenv
 import subprocess
 from src.utils.logger import logger
+from src.utils.status import StatusSubscriber
 import webbrowser
 import threading
 import time
@@ -31,6 +33,11 @@ class ControlUITk:
         # 添加日志更新定时器
         self._log_update_interval = 500  # 500ms
 
+        # 主程序发来的状态（STATUS_MODE=socket 时），由界面线程定时取出显示
+        self._status_queue = queue.Queue()
+        self._status_update_interval = 50  # 50ms
+        self.status_subscriber = None
+
         self.config_expanded = False  # 添加配置面板展开状态标志
 
         # 清空日志文件
@@ -56,6 +63,9 @@ class ControlUITk:
         # 启动日志监控
         self.start_log_monitor()
 
+        # 接收主程序的状态
+        self.start_status_monitor()
+
         # 添加进程检查和清理
         self.check_and_kill_existing_process()
 
@@ -157,6 +167,7 @@ class ControlUITk:
         self.add_symbol = BooleanVar(value=True)
         self.optimize_result = BooleanVar(value=False)
         self.keep_original_clipboard = BooleanVar(value=True)
+        self.status_overlay = BooleanVar(value=False)
 
         # GROQ配置
         self.groq_api_key = StringVar()
@@ -207,6 +218,11 @@ class ControlUITk:
         )
         self.config_btn.pack(side=tk.RIGHT)
 
+        # 当前状态
+        self.status_label = ttk.Label(control_frame, text="", foreground="#1976D2")
+        self.status_label.pack(side=tk.LEFT, padx=20)
+        self.create_status_overlay()
+
         # 日志显示区域（设置更合适的高度比例）
         self.create_log_area(container)
 
@@ -353,6 +369,12 @@ class ControlUITk:
             variable=self.keep_original_clipboard,
         ).pack(anchor=tk.W, pady=2)
 
+        ttk.Checkbutton(
+            options_frame,
+            text="在浮窗中显示状态（不向输入框输入状态文字）",
+            variable=self.status_overlay,
+        ).pack(anchor=tk.W, pady=2)
+
     def create_api_page(self, parent):
         """创建 API 配置页"""
         api_frame = ttk.Frame(parent, padding=15)
@@ -477,6 +499,7 @@ class ControlUITk:
                 "KEEP_ORIGINAL_CLIPBOARD": str(
                     self.keep_original_clipboard.get()
                 ).lower(),
+                "STATUS_MODE": "socket" if self.status_overlay.get() else "inline",
                 # GROQ配置
                 "GROQ_API_KEY": self.groq_api_key.get(),
                 "GROQ_BASE_URL": self.groq_base_url.get(),
@@ -542,6 +565,9 @@ class ControlUITk:
             self.keep_original_clipboard.set(
                 os.getenv("KEEP_ORIGINAL_CLIPBOARD", "true").lower() == "true"
             )
+            self.status_overlay.set(
+                os.getenv("STATUS_MODE", "inline").lower() == "socket"
+            )
 
             # 加载GROQ配置
             self.groq_api_key.set(os.getenv("GROQ_API_KEY", ""))
@@ -648,11 +674,67 @@ class ControlUITk:
             # 安排下一次检查
             self.root.after(self._log_update_interval, self._check_logs)
 
+    def create_status_overlay(self):
+        """创建置顶的状态浮窗，空闲时隐藏"""
+        self.overlay = tk.Toplevel(self.root)
+        self.overlay.overrideredirect(True)
+        self.overlay.attributes("-topmost", True)
+        self.overlay.configure(bg="#333333")
+        self.overlay_label = tk.Label(
+            self.overlay,
+            text="",
+            bg="#333333",
+            fg="white",
+            font=("Microsoft YaHei UI", 12),
+            padx=16,
+            pady=8,
+        )
+        self.overlay_label.pack()
+        self.overlay.withdraw()
+
+    def start_status_monitor(self):
+        """在后台接收主程序发来的状态"""
+        try:
+            self.status_subscriber = StatusSubscriber(self._status_queue.put).start()
+        except OSError as e:
+            logger.warning(f"无法接收状态消息: {e}")
+            return
+        self._check_status()
+
+    def _check_status(self):
+        """定时取出最新状态并更新状态栏和浮窗"""
+        if not self.running:
+            return
+        status = None
+        while not self._status_queue.empty():
+            status = self._status_queue.get_nowait()
+        if status is not None:
+            self.show_status(status.get("message", ""))
+        self.root.after(self._status_update_interval, self._check_status)
+
+    def show_status(self, message):
+        """显示状态，空消息时隐藏浮窗"""
+        self.status_label["text"] = message
+        if not message:
+            self.overlay.withdraw()
+            return
+        self.overlay_label["text"] = message
+        self.overlay.update_idletasks()
+        # 显示在屏幕底部居中
+        width = self.overlay.winfo_reqwidth()
+        x = (self.overlay.winfo_screenwidth() - width) // 2
+        y = self.overlay.winfo_screenheight() - 160
+        self.overlay.geometry(f"+{x}+{y}")
+        self.overlay.deiconify()
+        self.overlay.lift()
+
     def on_closing(self):
         """窗口关闭时的处理"""
         try:
             # 停止日志监控
             self.running = False
+            if self.status_subscriber is not None:
+                self.status_subscriber.stop()
 
             # 停止主程序
             if self.process is not None:
@@ -0,0 +1,84 @@
+import threading
+
+import sounddevice as sd
+
+from ..utils.logger import logger
+
+
+class DeviceRegistry:
+    """音频设备注册表
+
+    缓存 PortAudio 的设备枚举结果，由后台线程定期刷新；
+    录音热路径只读取缓存的默认输入设备，不再查询 PortAudio。
+    """
+
+    REFRESH_INTERVAL = 2  # 后台刷新间隔（秒）
+
+    def __init__(self, refresh_interval=None):
+        self.refresh_interval = refresh_interval or self.REFRESH_INTERVAL
+        self.devices = []
+        self.default_input = None
+        self._listeners = []
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self.refresh()
+
+    @property
+    def default_input_name(self):
+        """当前默认输入设备名称"""
+        return self.default_input["name"] if self.default_input else None
+
+    def add_listener(self, callback):
+        """注册默认输入设备变化的回调 callback(旧设备, 新设备)"""
+        self._listeners.append(callback)
+
+    def refresh(self):
+        """重新枚举设备，默认输入设备变化时通知监听者
+
+        Returns:
+            bool: 默认输入设备是否发生变化
+        """
+        devices = sd.query_devices()
+        default_input = sd.query_devices(kind="input")
+        with self._lock:
+            old = self.default_input
+            self.devices = devices
+            self.default_input = default_input
+        changed = old is not None and old["name"] != default_input["name"]
+        if changed:
+            for listener in self._listeners:
+                try:
+                    listener(old, default_input)
+                except Exception as e:
+                    logger.error(f"处理设备变化时出错: {e}")
+        return changed
+
+    def request_refresh(self):
+        """立即唤醒后台线程刷新（如收到热插拔通知时）"""
+        self._wakeup.set()
+
+    def start(self):
+        """启动后台刷新线程"""
+        if self._thread is not None:
+            return
+
+        def watch():
+            while True:
+                self._wakeup.wait(self.refresh_interval)
+                self._wakeup.clear()
+                try:
+                    self.refresh()
+                except Exception as e:
+                    logger.error(f"刷新音频设备列表时出错: {e}")
+
+        self._thread = threading.Thread(target=watch, daemon=True)
+        self._thread.start()
+
+    def input_devices(self):
+        """返回 (序号, 设备信息) 形式的输入设备列表"""
+        return [
+            (i, device)
+            for i, device in enumerate(self.devices)
+            if device["max_input_channels"] > 0
+        ]
@@ -0,0 +1,77 @@
+import io
+import os
+import time
+
+import soundfile as sf
+
+from ..utils.logger import logger
+
+
+class AudioEncoder:
+    """将录音编码为上传用的字节流，支持 WAV / FLAC / Ogg Opus
+
+    每种格式累计编码次数、原始字节数、编码后字节数与编码耗时，
+    便于比较压缩率和编码开销。
+    """
+
+    # 格式名 -> (soundfile 格式, 子类型, 上传文件名)
+    FORMATS = {
+        "wav": ("WAV", None, "audio.wav"),
+        "flac": ("FLAC", None, "audio.flac"),
+        "opus": ("OGG", "OPUS", "audio.ogg"),
+    }
+    OPUS_SAMPLE_RATES = (8000, 12000, 16000, 24000, 48000)
+
+    def __init__(self, audio_format=None):
+        audio_format = (audio_format or os.getenv("AUDIO_FORMAT", "wav")).lower()
+        if audio_format not in self.FORMATS:
+            raise ValueError(f"不支持的音频格式: {audio_format}")
+        if audio_format == "opus" and "OPUS" not in sf.available_subtypes("OGG"):
+            logger.warning("当前 libsndfile 不支持 Opus 编码，改用 FLAC")
+            audio_format = "flac"
+        self.audio_format = audio_format
+        self.stats = {}
+        logger.info(f"音频编码格式: {self.audio_format}")
+
+    def _resolve_format(self, sample_rate):
+        """Opus 只支持固定的几种采样率，其它采样率回退为 FLAC"""
+        if self.audio_format == "opus" and sample_rate not in self.OPUS_SAMPLE_RATES:
+            logger.warning(f"Opus 不支持 {sample_rate}Hz 采样率，本次改用 FLAC")
+            return "flac"
+        return self.audio_format
+
+    def encode(self, audio, sample_rate):
+        """编码音频
+
+        Args:
+            audio: NumPy 音频数组
+            sample_rate: 采样率
+
+        Returns:
+            io.BytesIO: 编码后的字节流，name 属性为带扩展名的上传文件名
+        """
+        audio_format = self._resolve_format(sample_rate)
+        file_format, subtype, filename = self.FORMATS[audio_format]
+
+        start = time.perf_counter()
+        audio_buffer = io.BytesIO()
+        sf.write(audio_buffer, audio, sample_rate, format=file_format, subtype=subtype)
+        elapsed = time.perf_counter() - start
+        audio_buffer.seek(0)  # 将缓冲区指针移动到开始位置
+        audio_buffer.name = filename
+
+        size = audio_buffer.getbuffer().nbytes
+        stats = self.stats.setdefault(
+            audio_format, {"count": 0, "raw_bytes": 0, "bytes": 0, "seconds": 0.0}
+        )
+        stats["count"] += 1
+        stats["raw_bytes"] += audio.nbytes
+        stats["bytes"] += size
+        stats["seconds"] += elapsed
+        logger.info(
+            f"音频编码 ({audio_format}): {audio.nbytes / 1024:.1f}KB -> {size / 1024:.1f}KB, "
+            f"耗时 {elapsed * 1000:.1f}毫秒 "
+            f"(累计 {stats['count']} 次, 平均压缩比 {stats['raw_bytes'] / max(stats['bytes'], 1):.1f}x, "
+            f"平均耗时 {stats['seconds'] / stats['count'] * 1000:.1f}毫秒)"
+        )
+        return audio_buffer
@@ -1,46 +1,75 @@
-import io
 import sounddevice as sd
-import numpy as np
-import queue
-import soundfile as sf
 import os
 import tempfile
+import threading
 from ..utils.logger import logger
+from ..utils.tracing import tracer
+from .devices import DeviceRegistry
+from .encoder import AudioEncoder
+from .ring_buffer import AudioRingBuffer
+from .resample import PolyphaseResampler, to_int16
+from .vad import VoiceActivityDetector
 import time
 
 
 class AudioRecorder:
     def __init__(self):
         self.recording = False
-        self.audio_queue = queue.Queue()
+        self.audio_buffer = None
         self.sample_rate = 16000
         # self.temp_dir = tempfile.mkdtemp()
         self.current_device = None
+        self.device_registry = None
         self.record_start_time = None
         self.min_record_duration = 1.0  # 最小录音时长（秒）
+        self.prealloc_seconds = 60  # 录音缓冲区预分配时长（秒），超出时自动扩容
+        # 可选的语音活动检测，上传前裁剪静音
+        self.vad = (
+            VoiceActivityDetector()
+            if os.getenv("VAD_TRIM", "false").lower() == "true"
+            else None
+        )
+        # 上传前统一重采样到 ASR 模型所需的采样率（16kHz 单声道 int16），0 表示保持原始采样率
+        self.target_sample_rate = int(os.getenv("AUDIO_TARGET_SAMPLE_RATE", "16000"))
+        self._resampler = None
+        self.encoder = AudioEncoder()
+        self.stream = None
         self._check_audio_devices()
+
+        # 常驻输入流：保持麦克风流常开并预录一小段音频，避免开头被截断
+        self.keep_warm = os.getenv("KEEP_STREAM_WARM", "false").lower() == "true"
+        self.preroll_ms = int(os.getenv("PREROLL_MS", "300"))
+        self._buffer_lock = threading.Lock()
+        self._on_chunk = None
+        self._pending_device_change = False
+        self._first_sample = False  # 是否等待记录第一块录音数据
+        if self.keep_warm:
+            self._open_warm_stream()
+
+        # 设备变化由注册表在后台检测，不再占用开始录音的关键路径
+        self.device_registry.add_listener(self._on_device_changed)
+        self.device_registry.start()
         # logger.info(f"初始化完成，临时文件目录: {self.temp_dir}")
         logger.info(f"初始化完成")
 
     def _list_audio_devices(self):
         """列出所有可用的音频输入设备"""
-        devices = sd.query_devices()
         logger.info("\n=== 可用的音频输入设备 ===")
-        for i, device in enumerate(devices):
-            if device["max_input_channels"] > 0:  # 只显示输入设备
-                status = "默认设备 ✓" if device["name"] == self.current_device else ""
-                logger.info(
-                    f"{i}: {device['name']} "
-                    f"(采样率: {int(device['default_samplerate'])}Hz, "
-                    f"通道数: {device['max_input_channels']}) {status}"
-                )
+        for i, device in self.device_registry.input_devices():
+            status = "默认设备 ✓" if device["name"] == self.current_device else ""
+            logger.info(
+                f"{i}: {device['name']} "
+                f"(采样率: {int(device['default_samplerate'])}Hz, "
+                f"通道数: {device['max_input_channels']}) {status}"
+            )
         logger.info("========================\n")
 
     def _check_audio_devices(self):
         """检查音频设备状态"""
         try:
-            devices = sd.query_devices()
-            default_input = sd.query_devices(kind="input")
+            if self.device_registry is None:
+                self.device_registry = DeviceRegistry()
+            default_input = self.device_registry.default_input
             self.current_device = default_input["name"]
 
             logger.info("\n=== 当前音频设备信息 ===")
@@ -61,63 +90,149 @@ class AudioRecorder:
             logger.error(f"检查音频设备时出错: {e}")
             raise RuntimeError("无法访问音频设备，请检查系统权限设置")
 
-    def _check_device_changed(self):
-        """检查默认音频设备是否发生变化"""
-        try:
-            default_input = sd.query_devices(kind="input")
-            if default_input["name"] != self.current_device:
-                logger.warning(f"\n音频设备已切换:")
-                logger.warning(f"从: {self.current_device}")
-                logger.warning(f"到: {default_input['name']}\n")
-                self.current_device = default_input["name"]
-                self._check_audio_devices()
-                return True
-            return False
-        except Exception as e:
-            logger.error(f"检查设备变化时出错: {e}")
-            return False
+    def _on_device_changed(self, old_device, new_device):
+        """默认输入设备变化时的回调（在设备注册表的后台线程中执行）"""
+        logger.warning(f"\n音频设备已切换:")
+        logger.warning(f"从: {old_device['name']}")
+        logger.warning(f"到: {new_device['name']}\n")
+        # 录音过程中不切换设备，避免采样率在录音中途改变，待下次开始录音前再应用
+        if self.recording:
+            self._pending_device_change = True
+            return
+        self._apply_device_change()
+
+    def _apply_device_change(self):
+        """按注册表中的新默认设备更新采样率，常驻模式下重新打开输入流"""
+        self._pending_device_change = False
+        self._check_audio_devices()
+        if self.keep_warm:
+            # 停止输入流要等回调返回，而回调需要 _buffer_lock：只在锁内摘下旧流，在锁外关闭
+            with self._buffer_lock:
+                stream, self.stream = self.stream, None
+            self._stop_stream(stream)
+            self._open_warm_stream()
+
+    def _open_stream(self, callback):
+        """打开并启动输入流"""
+        stream = sd.InputStream(
+            channels=1,
+            samplerate=self.sample_rate,
+            callback=callback,
+            device=None,  # 使用默认设备
+            latency="low",  # 使用低延迟模式
+        )
+        # 在 start() 之前记录：启动后回调线程可能立即写入 first_sample
+        tracer.event("stream_open")
+        stream.start()
+        return stream
 
-    def start_recording(self):
-        """开始录音"""
+    def _open_warm_stream(self):
+        """打开常驻输入流：空闲时持续写入预录环形缓冲，录音时写入录音缓冲"""
+        preroll = AudioRingBuffer(
+            0, max_frames=int(self.sample_rate * self.preroll_ms / 1000)
+        )
+
+        def audio_callback(indata, frames, time, status):
+            if status:
+                logger.warning(f"音频录制状态: {status}")
+            with self._buffer_lock:
+                if self.recording:
+                    if self._first_sample:
+                        self._first_sample = False
+                        tracer.event("first_sample")
+                    chunk = self.audio_buffer.write(indata)
+                    if self._on_chunk is not None:
+                        self._on_chunk(chunk)
+                else:
+                    preroll.write(indata)
+
+        stream = self._open_stream(audio_callback)
+        # 新的输入流与预录缓冲一起替换，开始录音时不会读到不匹配的两者
+        with self._buffer_lock:
+            self.stream = stream
+            self.preroll = preroll
+        logger.info(
+            f"常驻音频流已启动 (设备: {self.current_device}, 预录 {self.preroll_ms}毫秒)"
+        )
+
+    def _close_stream(self):
+        stream, self.stream = self.stream, None
+        self._stop_stream(stream)
+
+    @staticmethod
+    def _stop_stream(stream):
+        if stream is not None:
+            stream.stop()
+            stream.close()
+
+    def start_recording(self, on_chunk=None):
+        """开始录音
+
+        Args:
+            on_chunk: 可选回调，每收到一块音频即调用（用于边录边传）
+        """
         if not self.recording:
             try:
-                # 检查设备是否发生变化
-                self._check_device_changed()
+                if self._pending_device_change:
+                    self._apply_device_change()
 
                 logger.info("开始录音...")
-                self.recording = True
                 self.record_start_time = time.time()
-                self.audio_data = []
+                # 每次录音使用新的预分配缓冲区，回调直接写入，避免逐块分配
+                audio_buffer = AudioRingBuffer(self.sample_rate * self.prealloc_seconds)
+                self._first_sample = True
+
+                if self.keep_warm:
+                    # 常驻流已在运行：把预录音频放在录音开头，然后切换写入目标
+                    with self._buffer_lock:
+                        chunk = audio_buffer.write(self.preroll.view())
+                        if on_chunk is not None:
+                            on_chunk(chunk)
+                        self.preroll.clear()
+                        self.audio_buffer = audio_buffer
+                        self._on_chunk = on_chunk
+                        self.recording = True
+                    tracer.event("stream_open", warm=True)
+                    return
+
+                self.audio_buffer = audio_buffer
+                self.recording = True
 
                 def audio_callback(indata, frames, time, status):
                     if status:
                         logger.warning(f"音频录制状态: {status}")
                     if self.recording:
-                        self.audio_queue.put(indata.copy())
-
-                self.stream = sd.InputStream(
-                    channels=1,
-                    samplerate=self.sample_rate,
-                    callback=audio_callback,
-                    device=None,  # 使用默认设备
-                    latency="low",  # 使用低延迟模式
-                )
-                self.stream.start()
+                        if self._first_sample:
+                            self._first_sample = False
+                            tracer.event("first_sample")
+                        chunk = audio_buffer.write(indata)
+                        if on_chunk is not None:
+                            on_chunk(chunk)
+
+                self.stream = self._open_stream(audio_callback)
                 logger.info(f"音频流已启动 (设备: {self.current_device})")
             except Exception as e:
                 self.recording = False
                 logger.error(f"启动录音失败: {e}")
                 raise
 
-    def stop_recording(self):
-        """停止录音并返回音频数据"""
+    def stop_recording(self, encode=True):
+        """停止录音并返回音频数据
+
+        Args:
+            encode: 为 False 时不立即编码，返回调用后才编码的函数（边录边传成功时不需要完整录音）
+        """
         if not self.recording:
             return None
 
         logger.info("停止录音...")
-        self.recording = False
-        self.stream.stop()
-        self.stream.close()
+        if self.keep_warm:
+            with self._buffer_lock:
+                self.recording = False
+                self._on_chunk = None
+        else:
+            self.recording = False
+            self._close_stream()
 
         # 检查录音时长
         if self.record_start_time:
@@ -128,22 +243,54 @@ class AudioRecorder:
                 )
                 return "TOO_SHORT"
 
-        # 收集所有音频数据
-        audio_data = []
-        while not self.audio_queue.empty():
-            audio_data.append(self.audio_queue.get())
-
-        if not audio_data:
+        # 录音数据的零拷贝视图
+        audio = self.audio_buffer.view()
+        if not len(audio):
             logger.warning("没有收集到音频数据")
             return None
 
-        # 合并音频数据
-        audio = np.concatenate(audio_data)
         logger.info(f"音频数据长度: {len(audio)} 采样点")
 
-        # 将 numpy 数组转换为字节流
-        audio_buffer = io.BytesIO()
-        sf.write(audio_buffer, audio, self.sample_rate, format="WAV")
-        audio_buffer.seek(0)  # 将缓冲区指针移动到开始位置
+        if not encode:
+            return lambda: self.encode(audio)
+        return self.encode(audio)
+
+    def encode(self, audio):
+        """重采样、裁剪静音并编码为字节流"""
+        audio, sample_rate = self._prepare_audio(audio)
+
+        # 裁剪首尾静音、压缩过长停顿
+        if self.vad is not None:
+            audio = self.vad.trim(audio, sample_rate)
 
+        # 将 numpy 数组编码为字节流
+        audio_buffer = self.encoder.encode(audio, sample_rate)
+        tracer.event("encode_done", bytes=audio_buffer.getbuffer().nbytes)
         return audio_buffer
+
+    def _prepare_audio(self, audio):
+        """混为单声道并重采样到目标采样率、量化为 int16
+
+        Returns:
+            tuple: (音频数组, 采样率)
+        """
+        if not self.target_sample_rate:
+            return audio, self.sample_rate
+
+        start = time.perf_counter()
+        mono = audio.reshape(len(audio), -1).mean(axis=1)
+        if (
+            self._resampler is None
+            or self._resampler.src_rate != self.sample_rate
+            or self._resampler.dst_rate != self.target_sample_rate
+        ):
+            self._resampler = PolyphaseResampler(
+                self.sample_rate, self.target_sample_rate
+            )
+        pcm = to_int16(self._resampler(mono))
+        logger.info(
+            f"重采样 {self.sample_rate}Hz -> {self.target_sample_rate}Hz int16, "
+            f"{audio.nbytes / 1024:.1f}KB -> {pcm.nbytes / 1024:.1f}KB, "
+            f"耗时 {(time.perf_counter() - start) * 1000:.1f}毫秒"
+        )
+        return pcm, self.target_sample_rate
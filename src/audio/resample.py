@@ -0,0 +1,132 @@
+from math import gcd
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+class PolyphaseResampler:
+    """向量化的多相 FIR 重采样器
+
+    按 up/down 有理数比例重采样，抗混叠滤波器为 Kaiser 窗 sinc，
+    滤波器组在构造时生成，同一采样率组合可重复使用。
+    """
+
+    ZERO_CROSSINGS = 16  # sinc 每侧保留的过零点数，决定过渡带宽度
+    KAISER_BETA = 8.6  # Kaiser 窗参数，约 -80dB 阻带衰减
+    BLOCK_SIZE = 16384  # 每次计算的输出采样点数，限制临时内存
+
+    def __init__(self, src_rate, dst_rate):
+        self.src_rate = int(src_rate)
+        self.dst_rate = int(dst_rate)
+        g = gcd(self.src_rate, self.dst_rate)
+        self.up = self.dst_rate // g
+        self.down = self.src_rate // g
+
+        # 在上采样后的采样率下设计低通滤波器，截止频率取两者 Nyquist 的较小值
+        factor = max(self.up, self.down)
+        self.half = self.ZERO_CROSSINGS * factor
+        n = np.arange(-self.half, self.half + 1)
+        h = np.sinc(n / factor) / factor * np.kaiser(len(n), self.KAISER_BETA)
+        h *= self.up  # 补偿插零带来的增益损失
+
+        # 拆分为多相滤波器组：bank[p, k] = h[p + k * up]
+        self.taps = -(-len(h) // self.up)
+        h = np.concatenate((h, np.zeros(self.taps * self.up - len(h))))
+        self.bank = h.reshape(self.taps, self.up).T.astype(np.float32)
+
+    def __call__(self, audio):
+        """重采样单声道音频
+
+        Args:
+            audio: 一维 float 数组
+
+        Returns:
+            np.ndarray: 重采样后的 float32 数组
+        """
+        audio = np.asarray(audio, dtype=np.float32)
+        if self.up == self.down:
+            return audio
+
+        n_out = -(-len(audio) * self.up // self.down)
+        # 两侧补零，使所有抽头索引都落在数组内
+        padded = np.concatenate(
+            (np.zeros(self.taps, np.float32), audio, np.zeros(self.taps, np.float32))
+        )
+        return self._filter(padded, -self.taps, 0, n_out)
+
+    def _filter(self, buf, origin, start, stop):
+        """计算第 start 到 stop-1 个输出采样点
+
+        第 t 个输出点用到输入中第 m-taps+1 到第 m 个采样点，m = (t * down + half) // up。
+
+        Args:
+            buf: 输入数组，需包含上述范围内的全部采样点
+            origin: buf[0] 在输入中的位置（补零部分为负数）
+        """
+        # windows[i, k] = buf[i + taps - 1 - k]，是原数组的视图，不复制数据
+        windows = sliding_window_view(buf, self.taps)[:, ::-1]
+        out = np.empty(stop - start, dtype=np.float32)
+        for block in range(start, stop, self.BLOCK_SIZE):
+            t = np.arange(block, min(block + self.BLOCK_SIZE, stop)) * self.down + self.half
+            frames = windows[t // self.up - origin - self.taps + 1]
+            if self.up == 1:
+                # 整数倍降采样只有一个相位，直接矩阵乘
+                out[block - start : block - start + len(t)] = frames @ self.bank[0]
+            else:
+                out[block - start : block - start + len(t)] = np.einsum(
+                    "ij,ij->i", frames, self.bank[t % self.up]
+                )
+        return out
+
+
+class StreamingResampler:
+    """逐块重采样（边录边传时使用）
+
+    保留滤波所需的历史采样点，各块输出与 flush() 的输出依次拼接后，
+    与对整段音频调用 PolyphaseResampler 的结果一致。
+    """
+
+    def __init__(self, resampler):
+        self.resampler = resampler
+        self._buffer = np.zeros(resampler.taps, np.float32)  # 开头补零
+        self._origin = -resampler.taps  # _buffer[0] 在输入中的位置
+        self._received = 0
+        self._produced = 0
+
+    def __call__(self, audio):
+        """送入一块单声道音频，返回目前已能算出的输出"""
+        audio = np.asarray(audio, dtype=np.float32)
+        r = self.resampler
+        if r.up == r.down:
+            return audio
+
+        self._buffer = np.concatenate((self._buffer, audio))
+        self._received += len(audio)
+        # 输入到第 received-1 个采样点时，满足 t * down + half < received * up 的输出点都可计算
+        stop = max(-(-(self._received * r.up - r.half) // r.down), self._produced)
+        out = r._filter(self._buffer, self._origin, self._produced, stop)
+        self._produced = stop
+
+        # 丢弃之后不再用到的历史采样点
+        needed = (stop * r.down + r.half) // r.up - r.taps + 1
+        drop = min(needed - self._origin, len(self._buffer) - r.taps)
+        if drop > 0:
+            self._buffer = self._buffer[drop:]
+            self._origin += drop
+        return out
+
+    def flush(self):
+        """输入结束：末尾补零，返回剩余的输出"""
+        r = self.resampler
+        if r.up == r.down:
+            return np.zeros(0, np.float32)
+        n_out = -(-self._received * r.up // r.down)
+        padded = np.concatenate((self._buffer, np.zeros(r.taps, np.float32)))
+        out = r._filter(padded, self._origin, self._produced, n_out)
+        self._produced = n_out
+        return out
+
+
+def to_int16(audio):
+    """将 [-1, 1] 范围的浮点音频量化为 int16"""
+    return np.round(np.clip(audio, -1.0, 1.0) * 32767).astype(np.int16)
@@ -0,0 +1,82 @@
+import numpy as np
+
+
+class AudioRingBuffer:
+    """预分配的音频缓冲区，供音频回调直接写入
+
+    - 增长模式（max_frames 为 None）：容量不足时按倍数扩容，保留全部音频
+    - 环形模式（指定 max_frames）：容量固定，写满后覆盖最旧的数据
+
+    写入只做一次切片赋值，不为每个回调块单独分配内存。
+    """
+
+    def __init__(self, capacity, channels=1, max_frames=None, dtype=np.float32):
+        if max_frames is not None:
+            capacity = max_frames
+        self.channels = channels
+        self.max_frames = max_frames
+        self._data = np.empty((max(int(capacity), 1), channels), dtype=dtype)
+        self._start = 0  # 环形模式下最旧数据的位置
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def clear(self):
+        """清空缓冲区（不释放内存）"""
+        self._start = 0
+        self._size = 0
+
+    def _grow(self, required):
+        capacity = len(self._data)
+        while capacity < required:
+            capacity *= 2
+        data = np.empty((capacity, self.channels), dtype=self._data.dtype)
+        data[: self._size] = self._data[: self._size]
+        self._data = data
+
+    def write(self, frames):
+        """写入一块音频
+
+        Args:
+            frames: 形如 (帧数, 通道数) 的数组
+
+        Returns:
+            增长模式下返回刚写入区域的视图（后续写入不会覆盖），环形模式下返回 None
+        """
+        n = len(frames)
+        if self.max_frames is None:
+            if self._size + n > len(self._data):
+                self._grow(self._size + n)
+            chunk = self._data[self._size : self._size + n]
+            chunk[:] = frames
+            self._size += n
+            return chunk
+
+        capacity = len(self._data)
+        if n >= capacity:
+            # 单次写入超过容量，只保留最后 capacity 帧
+            self._data[:] = frames[-capacity:]
+            self._start = 0
+            self._size = capacity
+            return None
+        end = (self._start + self._size) % capacity
+        first = min(n, capacity - end)
+        self._data[end : end + first] = frames[:first]
+        self._data[: n - first] = frames[first:]
+        overflow = max(0, self._size + n - capacity)
+        self._start = (self._start + overflow) % capacity
+        self._size = min(self._size + n, capacity)
+        return None
+
+    def view(self):
+        """按时间顺序返回缓冲区内容
+
+        增长模式及未回绕的环形模式返回零拷贝视图；环形缓冲已回绕时需拼接一次。
+        """
+        end = self._start + self._size
+        if end <= len(self._data):
+            return self._data[self._start : end]
+        return np.concatenate(
+            (self._data[self._start :], self._data[: end - len(self._data)])
+        )
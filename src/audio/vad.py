@@ -0,0 +1,113 @@
+import os
+
+import numpy as np
+
+from ..utils.logger import logger
+
+
+class VoiceActivityDetector:
+    """基于帧能量与过零率的语音活动检测
+
+    用于在上传前裁剪首尾静音，并将过长的中间停顿压缩到固定长度。
+    全部计算均为 NumPy 向量化操作，几十秒的录音只需几毫秒。
+    """
+
+    FRAME_MS = 20  # 帧长（毫秒）
+    PADDING_MS = 200  # 语音段前后保留的余量（毫秒）
+    MAX_PAUSE_MS = 600  # 中间停顿的最大保留时长（毫秒）
+    ENERGY_MARGIN_DB = 10.0  # 高于底噪多少分贝视为语音
+    WEAK_MARGIN_DB = 5.0  # 弱能量帧（如清辅音）的阈值，需配合过零率
+    ZCR_THRESHOLD = 0.25  # 弱能量帧被视为语音的过零率下限
+    MIN_ENERGY_DB = -60.0  # 绝对能量下限，低于此值一律视为静音
+    NOISE_PERCENTILE = 5  # 以能量最低的百分之几的帧估计底噪
+
+    def __init__(self):
+        self.padding_ms = float(os.getenv("VAD_PADDING_MS", self.PADDING_MS))
+        self.max_pause_ms = float(os.getenv("VAD_MAX_PAUSE_MS", self.MAX_PAUSE_MS))
+        self.last_saved_seconds = 0.0
+
+    def _frames(self, audio, sample_rate):
+        """将音频切分为 (帧数, 帧长) 的二维视图"""
+        mono = audio.reshape(len(audio), -1).mean(axis=1)
+        if np.issubdtype(audio.dtype, np.integer):
+            mono /= np.iinfo(audio.dtype).max + 1  # 整型 PCM 归一化到 [-1, 1]
+        frame_len = max(1, int(sample_rate * self.FRAME_MS / 1000))
+        n_frames = len(mono) // frame_len
+        return mono[: n_frames * frame_len].reshape(n_frames, frame_len), frame_len
+
+    @staticmethod
+    def _energy_db(frames):
+        return 10 * np.log10(np.mean(frames**2, axis=1) + 1e-12)
+
+    def frame_energy(self, audio, sample_rate):
+        """逐帧能量（分贝）
+
+        Returns:
+            tuple: (能量数组, 帧长)
+        """
+        frames, frame_len = self._frames(audio, sample_rate)
+        return self._energy_db(frames), frame_len
+
+    def speech_mask(self, audio, sample_rate):
+        """逐帧判断是否为语音
+
+        Returns:
+            tuple: (布尔帧掩码, 帧长)
+        """
+        frames, frame_len = self._frames(audio, sample_rate)
+        if len(frames) == 0:
+            return np.zeros(0, dtype=bool), frame_len
+
+        energy_db = self._energy_db(frames)
+        zcr = np.mean(np.abs(np.diff(np.signbit(frames), axis=1)), axis=1)
+
+        noise_floor = np.percentile(energy_db, self.NOISE_PERCENTILE)
+        loud = energy_db > noise_floor + self.ENERGY_MARGIN_DB
+        weak = (energy_db > noise_floor + self.WEAK_MARGIN_DB) & (
+            zcr > self.ZCR_THRESHOLD
+        )
+        return (loud | weak) & (energy_db > self.MIN_ENERGY_DB), frame_len
+
+    def trim(self, audio, sample_rate):
+        """裁剪首尾静音并压缩过长的中间停顿
+
+        Args:
+            audio: 形如 (采样点数,) 或 (采样点数, 通道数) 的音频
+            sample_rate: 采样率
+
+        Returns:
+            裁剪后的音频；未检测到语音时原样返回
+        """
+        mask, frame_len = self.speech_mask(audio, sample_rate)
+        self.last_saved_seconds = 0.0
+        if not mask.any():
+            logger.info("VAD 未检测到语音，保留原始音频")
+            return audio
+
+        # 语音段前后各扩展若干帧余量
+        pad = int(self.padding_ms / self.FRAME_MS)
+        keep = np.convolve(mask.astype(np.int8), np.ones(2 * pad + 1), mode="same") > 0
+
+        # 首尾静音保持 False 直接丢弃；中间过长的静音段压缩为 max_pause，保留其首尾各一半
+        max_pause = int(self.max_pause_ms / self.FRAME_MS)
+        edges = np.diff(np.concatenate(([1], keep.astype(np.int8), [1])))
+        starts = np.flatnonzero(edges == -1)
+        ends = np.flatnonzero(edges == 1)
+        internal = (starts > 0) & (ends < len(keep))
+        for start, end in zip(starts[internal], ends[internal]):
+            keep[start:end] = True
+            if end - start > max_pause:
+                keep[start + max_pause // 2 : end - (max_pause - max_pause // 2)] = False
+
+        # 帧掩码展开到采样点，剩余的不足一帧的尾部跟随最后一帧
+        sample_mask = np.repeat(keep, frame_len)
+        tail = len(audio) - len(sample_mask)
+        sample_mask = np.concatenate((sample_mask, np.full(tail, keep[-1])))
+
+        trimmed = audio[sample_mask]
+        self.last_saved_seconds = (len(audio) - len(trimmed)) / sample_rate
+        logger.info(
+            f"VAD 裁剪静音 {self.last_saved_seconds:.2f}秒 "
+            f"({len(audio) / sample_rate:.2f}秒 -> {len(trimmed) / sample_rate:.2f}秒)"
+        )
+        return trimmed
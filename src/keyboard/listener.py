@@ -1,9 +1,14 @@
 from pynput.keyboard import Controller, Key, Listener
-import pyperclip
 from ..utils.logger import logger
+from ..utils.status import StatusChannel
+from ..utils.tracing import tracer
 import time
 from .inputState import InputState
+from .output import create_output, display_length
 import os
+import queue
+import threading
+from collections import deque
 
 
 class KeyboardManager:
@@ -24,9 +29,20 @@ class KeyboardManager:
         self.warning_message = None  # 用于跟踪警告信息
         self.option_press_time = None  # 记录 Option 按下的时间戳
         self.PRESS_DURATION_THRESHOLD = 0.5  # 按键持续时间阈值（秒）
-        self.is_checking_duration = False  # 用于控制定时器线程
+        self._duration_timer = None  # 按住达到阈值时触发录音的定时器
+        self._press_count = 0  # 按下次数，定时器据此忽略已经松开的那次按键
         self.has_triggered = False  # 用于防止重复触发
+        self._message_count = 0  # 显示警告/错误的次数，清除定时器据此忽略已被替换的消息
+        self._pending_results = 0  # 已结束录音、尚未输入结果的段数
+        self._deferred_results = deque()  # 录音期间到达、等录音结束后再输入的结果
+        # 键盘监听线程只把事件放入队列，由状态机线程依次处理；
+        # 按键标志与状态转换只在状态机线程中修改
+        self._events = queue.SimpleQueue()
         self._original_clipboard = None  # 保存原始剪贴板内容
+        # 流式输出时两次粘贴的最小间隔，避免剪贴板在目标应用读取前被覆盖
+        self.stream_paste_interval = (
+            int(os.getenv("LLM_STREAM_PASTE_INTERVAL_MS", "100")) / 1000
+        )
 
         # 回调函数
         self.on_record_start = on_record_start
@@ -55,6 +71,9 @@ class KeyboardManager:
         else:
             self.sysetem_platform = Key.cmd
             logger.info("配置到Mac平台")
+        self.output = create_output(self.keyboard, self.sysetem_platform)
+        # 状态显示在输入框中 (inline) 或发送给状态浮窗 (socket)
+        self.status = StatusChannel()
 
         # 获取转录和翻译按钮
         transcriptions_button = os.getenv("TRANSCRIPTIONS_BUTTON")
@@ -76,6 +95,18 @@ class KeyboardManager:
             f"按住 {translations_button} + {transcriptions_button} 键：实时语音翻译（翻译成英文）"
         )
 
+        self._handlers = {
+            "press": self._handle_press,
+            "release": self._handle_release,
+            "threshold": self._on_duration_reached,
+            "message": self._handle_message,
+            "clear_message": self._handle_clear_message,
+            "result": self._deferred_results.append,
+        }
+        threading.Thread(
+            target=self._run_state_machine, name="keyboard-state", daemon=True
+        ).start()
+
     @property
     def state(self):
         """获取当前状态"""
@@ -89,229 +120,351 @@ class KeyboardManager:
 
             # 获取状态消息
             message = self._state_messages[new_state]
+            if new_state in (InputState.WARNING, InputState.ERROR):
+                message = message(
+                    self.warning_message
+                    if new_state == InputState.WARNING
+                    else self.error_message
+                )
+            self.status.publish(new_state.name, message)
 
             # 根据状态转换类型显示不同消息
             match new_state:
                 case InputState.RECORDING:
                     # 录音状态
-                    self.temp_text_length = 0
-                    self.type_temp_text(message)
+                    tracer.begin(mode="transcriptions")
+                    tracer.event("key_threshold")
+                    self._keep_previous_text()
+                    self._show_status(message)
                     self.on_record_start()
 
                 case InputState.RECORDING_TRANSLATE:
                     # 翻译,录音状态
-                    self.temp_text_length = 0
-                    self.type_temp_text(message)
+                    tracer.begin(mode="translations")
+                    tracer.event("key_threshold")
+                    self._keep_previous_text()
+                    self._show_status(message)
                     self.on_translate_start()
 
                 case InputState.PROCESSING:
-                    self._delete_previous_text()
-                    self.type_temp_text(message)
+                    tracer.event("key_release")
+                    self._show_status(message)
                     self.processing_text = message
+                    self._pending_results += 1
                     self.on_record_stop()
 
                 case InputState.TRANSLATING:
                     # 翻译状态
-                    self._delete_previous_text()
-                    self.type_temp_text(message)
+                    tracer.event("key_release")
+                    self._show_status(message)
                     self.processing_text = message
+                    self._pending_results += 1
                     self.on_translate_stop()
 
                 case InputState.WARNING:
                     # 警告状态
-                    message = message(self.warning_message)
-                    self._delete_previous_text()
-                    self.type_temp_text(message)
+                    self._show_status(message)
                     self.warning_message = None
                     self._schedule_message_clear()
 
                 case InputState.ERROR:
                     # 错误状态
-                    message = message(self.error_message)
-                    self._delete_previous_text()
-                    self.type_temp_text(message)
+                    self._show_status(message)
                     self.error_message = None
                     self._schedule_message_clear()
 
                 case InputState.IDLE:
                     # 空闲状态，清除所有临时文本
                     self.processing_text = None
+                    tracer.event("idle")
 
                 case _:
                     # 其他状态
-                    self.type_temp_text(message)
+                    self._show_status(message)
 
-    def _schedule_message_clear(self):
-        """计划清除消息"""
+    def _keep_previous_text(self):
+        """开始录音时保留之前输入的文字；仍有录音在处理时替换掉它的处理状态"""
+        if not self._pending_results:
+            self.temp_text_length = 0
 
-        def clear_message():
-            time.sleep(2)  # 警告消息显示2秒
-            self.state = InputState.IDLE
-
-        import threading
+    def _show_status(self, message):
+        """替换输入框中的状态文字；状态发送给浮窗时不改动输入框"""
+        if not self.status.inline:
+            return
+        self._delete_previous_text()
+        self.type_temp_text(message)
 
-        threading.Thread(target=clear_message, daemon=True).start()
+    def _schedule_message_clear(self):
+        """计划清除消息，警告消息显示2秒"""
+        self._message_count += 1
+        timer = threading.Timer(
+            2, self._events.put, (("clear_message", self._message_count),)
+        )
+        timer.daemon = True
+        timer.start()
+
+    def _handle_clear_message(self, message_count):
+        if message_count == self._message_count and self.state in (
+            InputState.WARNING,
+            InputState.ERROR,
+        ):
+            self.state = InputState.IDLE
 
     def show_warning(self, warning_message):
-        """显示警告消息"""
-        self.warning_message = warning_message
-        self.state = InputState.WARNING
+        """显示警告消息（可在任意线程调用）"""
+        self._events.put(("message", InputState.WARNING, warning_message))
 
     def show_error(self, error_message):
-        """显示错误消息"""
-        self.error_message = error_message
-        self.state = InputState.ERROR
+        """显示错误消息（可在任意线程调用）"""
+        self._events.put(("message", InputState.ERROR, error_message))
+
+    def _handle_message(self, state, message):
+        if state == InputState.WARNING:
+            self.warning_message = message
+        else:
+            self.error_message = message
+        self.state = state
 
     def _save_clipboard(self):
         """保存当前剪贴板内容"""
         if self._original_clipboard is None:
-            self._original_clipboard = pyperclip.paste()
+            self._original_clipboard = self.output.clipboard()
 
     def _restore_clipboard(self):
-        """恢复原始剪贴板内容"""
+        """恢复原始剪贴板内容（等目标应用读完最近一次粘贴后在后台进行）"""
         if self._original_clipboard is not None:
-            pyperclip.copy(self._original_clipboard)
+            self.output.copy_later(self._original_clipboard)
             self._original_clipboard = None
 
-    def type_text(self, text, error_message=None):
-        """将文字输入到当前光标位置
+    def type_text(self, text, error_message=None, trace=None):
+        """将文字输入到当前光标位置（可在任意线程调用）
+
+        结果交给状态机线程输入，与状态提示文字的输入、删除依次进行，不会交错；
+        录音期间到达的结果等录音结束后再输入。
 
         Args:
-            text: 要输入的文本或包含文本和错误信息的元组
+            text: 要输入的文本、可迭代的流式文本，或包含文本和错误信息的元组
             error_message: 错误信息
+            trace: 本段录音的追踪，由状态机线程记录 idle 事件后结束
         """
         # 如果text是元组，说明是从process_audio返回的结果
         if isinstance(text, tuple):
             text, error_message = text
+        self._events.put(("result", (text, error_message, trace)))
+
+    def _flush_results(self):
+        """不在录音时依次输入暂存的结果"""
+        while self._deferred_results and not self.state.is_recording:
+            text, error_message, trace = self._deferred_results.popleft()
+            with tracer.activate(trace):
+                status = self._type_result(text, error_message)
+            self._handle_typed(trace, status)
+
+    def _type_result(self, text, error_message):
+        """在状态机线程中输入一段结果，返回追踪状态"""
+        self._pending_results = max(self._pending_results - 1, 0)
 
         if error_message:
-            self.show_error(error_message)
-            return
+            self._handle_message(InputState.ERROR, error_message)
+            return "error"
 
         if not text:
             # 如果没有文本且不是错误，可能是录音时长不足
             if self.state in (InputState.PROCESSING, InputState.TRANSLATING):
-                self.show_warning("录音时长过短，请至少录制1秒")
-            return
+                self._handle_message(InputState.WARNING, "录音时长过短，请至少录制1秒")
+            return "ok"
 
         try:
             logger.info("正在输入转录文本...")
             self._delete_previous_text()
 
-            # 先输入文本和完成标记
-            self.type_temp_text(text + " ✅")
-
-            # 等待一小段时间确保文本已输入
-            time.sleep(0.5)
-
-            # 删除完成标记（2个字符：空格和✅）
-            self.temp_text_length = 2
-            self._delete_previous_text()
-
+            # 粘贴后不等待：按键按顺序处理，改动剪贴板的操作由输出方式延后到目标应用读完之后
+            if isinstance(text, str):
+                self.output.insert(text)
+            else:
+                text = self._type_stream(text)
+            tracer.event("paste_complete", chars=len(text))
+
+            if self._pending_results and self.state in (
+                InputState.PROCESSING,
+                InputState.TRANSLATING,
+            ):
+                # 后面的录音仍在处理：在结果之后重新显示处理状态，剪贴板留到最后一段输入后再处理。
+                # 状态文字也经剪贴板粘贴，需等结果被读取
+                self.output.wait_settled()
+                self._show_status(self.processing_text)
             # 将转录结果复制到剪贴板
-            if os.getenv("KEEP_ORIGINAL_CLIPBOARD", "true").lower() != "true":
-                pyperclip.copy(text)
+            elif os.getenv("KEEP_ORIGINAL_CLIPBOARD", "true").lower() != "true":
+                self.output.copy_later(text)
             else:
                 # 恢复原始剪贴板内容
                 self._restore_clipboard()
 
             logger.info("文本输入完成")
-
-            # 清理处理状态
-            self.state = InputState.IDLE
+            return "ok"
         except Exception as e:
             logger.error(f"文本输入失败: {e}")
-            self.show_error(f"❌ 文本输入失败: {e}")
+            self._handle_message(InputState.ERROR, f"❌ 文本输入失败: {e}")
+            return "error"
 
     def _delete_previous_text(self):
         """删除之前输入的临时文本"""
         if self.temp_text_length > 0:
-            for _ in range(self.temp_text_length):
-                self.keyboard.press(Key.backspace)
-                self.keyboard.release(Key.backspace)
+            self.output.delete(self.temp_text_length)
 
         self.temp_text_length = 0
 
+    def _paste(self, text):
+        """通过剪贴板粘贴文本"""
+        self.output.paste(text)
+
+    def _type_stream(self, stream):
+        """边接收边输入流式文本
+
+        积攒的内容按最小间隔分批粘贴；模型调用中途失败时删除已输入的部分，
+        改为输入 stream.fallback（原文或重新处理的结果）。
+
+        Returns:
+            str: 实际输入的完整文本
+        """
+        pending = ""
+        typed = 0
+        last_paste = 0.0
+        try:
+            for chunk in stream:
+                pending += chunk
+                if time.time() - last_paste >= self.stream_paste_interval:
+                    self._paste(pending)
+                    typed += len(pending)
+                    pending = ""
+                    last_paste = time.time()
+            if pending:
+                time.sleep(max(last_paste + self.stream_paste_interval - time.time(), 0))
+                self._paste(pending)
+                typed += len(pending)
+                last_paste = time.time()
+            if not typed:
+                raise ValueError("模型没有返回内容")
+            logger.info(f"流式输出完成: {stream.text}")
+            text = stream.text
+        except Exception as e:
+            logger.warning(f"流式输出中断，改为输入备用文本: {e}")
+            self.temp_text_length = typed
+            self._delete_previous_text()
+            time.sleep(max(last_paste + self.stream_paste_interval - time.time(), 0))
+            self._paste(stream.fallback)
+            last_paste = time.time()
+            text = stream.fallback
+        return text
+
     def type_temp_text(self, text):
         """输入临时状态文本"""
         if not text:
             return
 
-        # 将文本复制到剪贴板
-        pyperclip.copy(text)
-
-        # 模拟 Ctrl + V 粘贴文本
-        with self.keyboard.pressed(self.sysetem_platform):
-            self.keyboard.press("v")
-            self.keyboard.release("v")
+        self.output.insert(text)
 
         # 更新临时文本长度
-        self.temp_text_length = len(text)
+        self.temp_text_length = display_length(text)
 
-    def start_duration_check(self):
-        """开始检查按键持续时间"""
-        if self.is_checking_duration:
-            return
+    def _handle_typed(self, trace=None, status="ok"):
+        """结果输入完成；仍有录音在处理或已开始下一段录音时保持当前状态
 
-        def check_duration():
-            while self.is_checking_duration and self.option_pressed:
-                current_time = time.time()
-                if (
-                    not self.has_triggered
-                    and self.option_press_time
-                    and (current_time - self.option_press_time)
-                    >= self.PRESS_DURATION_THRESHOLD
-                ):
+        idle 事件记录到这段录音自己的追踪中，随后结束追踪。
+        """
+        with tracer.activate(trace):
+            if not self._pending_results and self.state in (
+                InputState.PROCESSING,
+                InputState.TRANSLATING,
+            ):
+                self.state = InputState.IDLE
+        tracer.finish(trace, status=status)
+
+    def start_duration_check(self, pressed_at=None):
+        """按下按键时启动定时器，按住达到阈值时触发录音，松开时取消
 
-                    # 达到阈值时触发相应功能
-                    if (
-                        self.option_pressed
-                        and self.shift_pressed
-                        and self.state.can_start_recording
-                    ):
-                        self.state = InputState.RECORDING_TRANSLATE
-                        # self.on_translate_start()
-                        self.has_triggered = True
-                    elif (
-                        self.option_pressed
-                        and not self.shift_pressed
-                        and self.state.can_start_recording
-                    ):
-                        self.state = InputState.RECORDING
-                        # self.on_record_start()
-                        self.has_triggered = True
-
-                time.sleep(0.01)  # 短暂休眠以降低 CPU 使用率
-
-        self.is_checking_duration = True
-        import threading
-
-        threading.Thread(target=check_duration, daemon=True).start()
+        Args:
+            pressed_at: 按下的时间，事件在队列中等待的时间从阈值中扣除
+        """
+        if self._duration_timer is not None:
+            return
+        delay = self.PRESS_DURATION_THRESHOLD
+        if pressed_at is not None:
+            delay = max(delay - (time.time() - pressed_at), 0)
+        self._duration_timer = threading.Timer(
+            delay, self._events.put, (("threshold", self._press_count),)
+        )
+        self._duration_timer.daemon = True
+        self._duration_timer.start()
+
+    def cancel_duration_check(self):
+        """取消尚未触发的定时器"""
+        timer, self._duration_timer = self._duration_timer, None
+        if timer is not None:
+            timer.cancel()
+
+    def _on_duration_reached(self, press_count):
+        """按键持续时间达到阈值时触发相应功能"""
+        if press_count != self._press_count:
+            return  # 定时器触发时这次按键已经松开
+        self._duration_timer = None
+        if self.has_triggered or not self.option_pressed or not self.state.can_start_recording:
+            return
+        if self.shift_pressed:
+            self.state = InputState.RECORDING_TRANSLATE
+        else:
+            self.state = InputState.RECORDING
+        self.has_triggered = True
 
     def on_press(self, key):
-        """按键按下时的回调"""
+        """按键按下时的回调
+
+        在系统键盘钩子线程中执行，耗时过长会拖慢全局按键（Windows 上超时的钩子会被系统移除），
+        因此只把事件放入队列。
+        """
+        self._events.put(("press", key, time.time()))
+
+    def on_release(self, key):
+        """按键释放时的回调，只把事件放入队列"""
+        self._events.put(("release", key, time.time()))
+
+    def _run_state_machine(self):
+        """状态机线程：依次处理按键、定时器和结果输入等事件
+
+        所有键盘输出（状态提示与结果）都在这个线程中进行，互不交错。
+        """
+        while True:
+            kind, *args = self._events.get()
+            try:
+                self._handlers[kind](*args)
+                self._flush_results()
+            except Exception as e:
+                logger.error(f"处理键盘事件失败 ({kind}): {e}", exc_info=True)
+
+    def _handle_press(self, key, pressed_at):
         try:
             if key == self.transcriptions_button:  # Key.f8:  # Option 键按下
+                if self.option_pressed:
+                    return  # 按住时的自动重复，不重新计时
                 # 在开始任何操作前保存剪贴板内容
-                if self._original_clipboard is None:
-                    self._original_clipboard = pyperclip.paste()
+                self._save_clipboard()
 
                 self.option_pressed = True
-                self.option_press_time = time.time()
-                self.start_duration_check()
+                self.option_press_time = pressed_at
+                self.start_duration_check(pressed_at)
             elif key == self.translations_button:
                 self.shift_pressed = True
         except AttributeError:
             pass
 
-    def on_release(self, key):
-        """按键释放时的回调"""
+    def _handle_release(self, key, released_at):
         try:
             if key == self.transcriptions_button:  # Key.f8:  # Option 键释放
                 self.shift_pressed = False
                 self.option_pressed = False
                 self.option_press_time = None
-                self.is_checking_duration = False
+                self._press_count += 1
+                self.cancel_duration_check()
 
                 if self.has_triggered:
                     if self.state == InputState.RECORDING_TRANSLATE:
@@ -348,11 +501,14 @@ class KeyboardManager:
         self.option_pressed = False
         self.shift_pressed = False
         self.option_press_time = None
-        self.is_checking_duration = False
+        self._press_count += 1
+        self.cancel_duration_check()
         self.has_triggered = False
         self.processing_text = None
         self.error_message = None
         self.warning_message = None
+        # 刚结束的这段录音不会再有结果
+        self._pending_results = max(self._pending_results - 1, 0)
 
         # 设置为空闲状态
         self.state = InputState.IDLE
@@ -0,0 +1,158 @@
+import os
+import threading
+import time
+import unicodedata
+
+import pyperclip
+from pynput.keyboard import Key
+
+from ..utils.logger import logger
+
+
+def display_length(text):
+    """文本在编辑器中占的字符数（退格次数）
+
+    变体选择符（如 ⚠️ 中的 U+FE0F）、零宽连接符和组合附加符号不单独占位，
+    按 len() 计算会多删掉光标前的字。
+    """
+    return sum(
+        1
+        for char in text
+        if char not in "\ufe0e\ufe0f\u200d" and not unicodedata.combining(char)
+    )
+
+
+class KeystrokeOutput:
+    """逐键输出：文本通过剪贴板粘贴，删除时逐字符退格
+
+    兼容性最好，也是默认方式。粘贴后不阻塞等待：按键事件按顺序处理，只有改动剪贴板
+    需要等目标应用读完，恢复原剪贴板等改动交给 copy_later() 在后台延后进行。
+    目标应用何时读完剪贴板无从得知，延后的时长只是留足余量的经验值。
+    """
+
+    SETTLE_MS = 500  # 粘贴后保留剪贴板内容的基础时长
+    SETTLE_PER_KCHAR_MS = 50  # 每千字额外保留的时长
+    SETTLE_MAX_MS = 1000  # 保留时长上限
+
+    def __init__(self, keyboard, paste_modifier):
+        """
+        Args:
+            keyboard: pynput 键盘控制器
+            paste_modifier: 粘贴快捷键的修饰键（Windows 为 Ctrl，macOS 为 Cmd）
+        """
+        self.keyboard = keyboard
+        self.paste_modifier = paste_modifier
+        self._clipboard_lock = threading.Lock()
+        self._settled_at = 0.0  # 最近一次粘贴的内容可以从剪贴板移除的时间（monotonic）
+        self._pending_copy = None  # 等待写入剪贴板的内容
+        self._copy_timer = None
+
+    def paste(self, text):
+        """通过剪贴板粘贴文本"""
+        with self._clipboard_lock:
+            pyperclip.copy(text)
+            with self.keyboard.pressed(self.paste_modifier):
+                self.keyboard.press("v")
+                self.keyboard.release("v")
+            self._settled_at = time.monotonic() + self.settle_seconds(len(text))
+
+    def insert(self, text):
+        """在光标处输入文本"""
+        self.paste(text)
+
+    def delete(self, count):
+        """删除光标前 count 个字符"""
+        for _ in range(count):
+            self.keyboard.press(Key.backspace)
+            self.keyboard.release(Key.backspace)
+
+    def settle_seconds(self, length):
+        """粘贴 length 个字符后剪贴板内容需要保留的时间（秒）"""
+        ms = self.SETTLE_MS + self.SETTLE_PER_KCHAR_MS * length / 1000
+        return min(ms, self.SETTLE_MAX_MS) / 1000
+
+    def wait_settled(self):
+        """等待最近一次粘贴的内容被目标应用读取；没有粘贴过时立即返回"""
+        time.sleep(max(self._settled_at - time.monotonic(), 0))
+
+    def clipboard(self):
+        """当前剪贴板内容；有尚未写入的内容时返回该内容"""
+        with self._clipboard_lock:
+            if self._pending_copy is not None:
+                return self._pending_copy
+            return pyperclip.paste()
+
+    def copy_later(self, text):
+        """在目标应用读完最近一次粘贴的内容后把剪贴板设为 text（后台进行，不阻塞）"""
+        with self._clipboard_lock:
+            self._pending_copy = text
+            if self._copy_timer is None:
+                self._schedule_copy()
+
+    def _schedule_copy(self):
+        delay = max(self._settled_at - time.monotonic(), 0)
+        self._copy_timer = threading.Timer(delay, self._apply_pending_copy)
+        self._copy_timer.daemon = True
+        self._copy_timer.start()
+
+    def _apply_pending_copy(self):
+        with self._clipboard_lock:
+            if time.monotonic() < self._settled_at:
+                # 等待期间又有新的粘贴，顺延到它也被读取之后
+                self._schedule_copy()
+                return
+            self._copy_timer = None
+            if self._pending_copy is not None:
+                pyperclip.copy(self._pending_copy)
+                self._pending_copy = None
+
+
+class BulkOutput(KeystrokeOutput):
+    """批量输出：先选中再一次性删除，短文本可直接键入
+
+    逐字符退格时目标应用每次都要重新排版、各记一次撤销；选中后删除只产生一次编辑。
+    按键数并不减少（n 次 Shift+← 加一次退格）：按词或按行选中的范围取决于光标前的内容，
+    可能删掉状态文字之前用户自己的文字，因此仍逐字符选中。
+    Shift+方向键在终端等应用中不是选中，这类应用请使用 keystroke。
+    """
+
+    SELECT_MIN_CHARS = 3  # 超过该字符数时先选中再删除
+    TYPE_MAX_CHARS = 0  # 不超过该字符数的文本直接键入，0 表示总是粘贴
+
+    def __init__(self, keyboard, paste_modifier):
+        super().__init__(keyboard, paste_modifier)
+        # 直接键入不经过剪贴板，但输入法开启时英文字母会被输入法截获，默认关闭
+        self.type_max_chars = int(os.getenv("OUTPUT_TYPE_MAX_CHARS", self.TYPE_MAX_CHARS))
+
+    def insert(self, text):
+        if len(text) <= self.type_max_chars:
+            self.keyboard.type(text)
+        else:
+            self.paste(text)
+
+    def delete(self, count):
+        if count <= self.SELECT_MIN_CHARS:
+            super().delete(count)
+            return
+        with self.keyboard.pressed(Key.shift):
+            for _ in range(count):
+                self.keyboard.press(Key.left)
+                self.keyboard.release(Key.left)
+        self.keyboard.press(Key.backspace)
+        self.keyboard.release(Key.backspace)
+
+
+OUTPUT_BACKENDS = {
+    "keystroke": KeystrokeOutput,
+    "bulk": BulkOutput,
+}
+
+
+def create_output(keyboard, paste_modifier):
+    """按 OUTPUT_BACKEND 创建输出方式"""
+    name = os.getenv("OUTPUT_BACKEND", "keystroke").lower()
+    if name not in OUTPUT_BACKENDS:
+        logger.warning(f"未知的 OUTPUT_BACKEND: {name}，使用 keystroke")
+        name = "keystroke"
+    logger.info(f"文本输出方式: {name}")
+    return OUTPUT_BACKENDS[name](keyboard, paste_modifier)
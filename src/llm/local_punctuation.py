@@ -0,0 +1,141 @@
+import os
+import re
+import time
+
+from ..utils.logger import logger
+from ..utils.tracing import tracer
+
+
+class LocalPunctuator:
+    """基于规则的本地标点（中文 / 英文）
+
+    常见的短句在本地毫秒级完成：按停顿（空格）和连词断句加逗号，按疑问词、
+    语气词决定句末是问号还是句号。文本过长或规则把握不大（置信度低）时
+    返回 None，由调用方改用模型添加标点。
+    """
+
+    MAX_CHARS = 40  # 超过该长度交给模型
+    MIN_CONFIDENCE = 0.7  # 置信度低于该值交给模型
+    MAX_RUN = 16  # 中文超过该长度仍无停顿时开始降低置信度
+
+    SENTENCE_END = "。！？.!?…"
+    PUNCTUATION = "，。！？、；：,.!?;:…"
+    # 前面已有足够内容时，在这些连词前加逗号
+    ZH_CONJUNCTIONS = (
+        "但是", "可是", "不过", "所以", "因为", "因此", "然后", "而且",
+        "如果", "虽然", "或者", "并且", "否则", "于是",
+    )
+    ZH_QUESTION_PARTICLES = ("吗", "么", "呢")
+    ZH_QUESTION_WORDS = (
+        "什么", "怎么", "为什么", "为何", "哪", "谁", "几", "多少",
+        "是不是", "能不能", "有没有", "要不要", "会不会", "可不可以", "对不对", "好不好",
+    )
+    # 疑问词出现在这些词之后多为间接疑问的陈述句（如“我不知道他去哪了”）
+    ZH_EMBEDDING_VERBS = ("知道", "清楚", "确定", "记得", "明白")
+    EN_QUESTION_STARTERS = {
+        "what", "why", "how", "who", "whom", "whose", "where", "when", "which",
+        "is", "are", "am", "was", "were", "do", "does", "did", "can", "could",
+        "would", "will", "should", "shall", "may", "might", "have", "has", "had",
+    }
+    EN_CONJUNCTIONS = {"but", "so", "because", "although", "however", "though"}
+
+    CJK = re.compile(r"[㐀-鿿]")
+
+    def __init__(self):
+        self.max_chars = int(os.getenv("LOCAL_PUNCTUATION_MAX_CHARS", self.MAX_CHARS))
+        self.min_confidence = float(
+            os.getenv("LOCAL_PUNCTUATION_MIN_CONFIDENCE", self.MIN_CONFIDENCE)
+        )
+
+    def is_chinese(self, text):
+        letters = [c for c in text if not c.isspace()]
+        return bool(letters) and len(self.CJK.findall(text)) / len(letters) > 0.3
+
+    def punctuate(self, text):
+        """添加标点
+
+        Returns:
+            tuple: (加标点后的文本, 置信度 0~1)
+        """
+        text = text.strip()
+        if not text:
+            return text, 1.0
+        if any(c in self.PUNCTUATION for c in text):
+            # 识别结果已带标点（如 SenseVoice），不再改动
+            return text, 1.0
+        if self.is_chinese(text):
+            return self._punctuate_chinese(text)
+        return self._punctuate_english(text)
+
+    def _punctuate_chinese(self, text):
+        confidence = 1.0
+        # 识别结果中的空格通常对应停顿；夹在拉丁字母之间的空格是英文单词间隔，保留
+        clauses = [c for c in re.split(r"(?<![A-Za-z0-9])\s+(?![A-Za-z0-9])", text) if c]
+        pieces = []
+        for clause in clauses:
+            pieces.extend(self._split_conjunctions(clause))
+        longest = max(len(piece) for piece in pieces)
+        if longest > self.MAX_RUN:
+            confidence -= 0.05 * (longest - self.MAX_RUN)
+
+        last = pieces[-1]
+        if last.endswith(self.ZH_QUESTION_PARTICLES):
+            end = "？"
+        elif any(word in last for word in self.ZH_QUESTION_WORDS):
+            # 含疑问词但没有语气词，也可能是陈述句
+            first = min(last.find(word) for word in self.ZH_QUESTION_WORDS if word in last)
+            embedded = any(verb in last[:first] for verb in self.ZH_EMBEDDING_VERBS)
+            end = "。" if embedded else "？"
+            confidence -= 0.25
+        else:
+            end = "。"
+        if last.endswith("吧"):
+            confidence -= 0.2  # 既可能是祈使也可能是疑问
+        return "，".join(pieces) + end, max(confidence, 0.0)
+
+    def _split_conjunctions(self, clause):
+        """在连词前断开，前后都至少保留 4 个字"""
+        pattern = "|".join(self.ZH_CONJUNCTIONS)
+        pieces = []
+        start = 0
+        for match in re.finditer(pattern, clause):
+            if match.start() - start >= 4 and len(clause) - match.start() >= 4:
+                pieces.append(clause[start : match.start()])
+                start = match.start()
+        pieces.append(clause[start:])
+        return pieces
+
+    def _punctuate_english(self, text):
+        words = text.split()
+        confidence = 1.0
+        if len(words) > 12:
+            confidence -= 0.05 * (len(words) - 12)
+
+        words = ["I" if w == "i" else re.sub(r"^i'", "I'", w) for w in words]
+        out = []
+        for i, word in enumerate(words):
+            if i >= 3 and word.lower() in self.EN_CONJUNCTIONS and not out[-1].endswith(","):
+                out[-1] += ","
+            out.append(word)
+        out[0] = out[0][:1].upper() + out[0][1:]
+
+        end = "?" if words[0].lower() in self.EN_QUESTION_STARTERS else "."
+        if end == "?" and words[0].lower() in ("is", "was", "have", "had", "do", "did"):
+            confidence -= 0.1  # 也可能只是陈述句开头
+        return " ".join(out) + end, max(confidence, 0.0)
+
+    def try_punctuate(self, text):
+        """本地有把握时返回加标点后的文本，否则返回 None 交给模型"""
+        if len(text) > self.max_chars:
+            return None
+        start = time.perf_counter()
+        with tracer.span("local_punctuation"):
+            result, confidence = self.punctuate(text)
+        elapsed = (time.perf_counter() - start) * 1000
+        if confidence < self.min_confidence:
+            logger.info(
+                f"本地标点置信度 {confidence:.2f} 低于 {self.min_confidence}，改用模型"
+            )
+            return None
+        logger.info(f"本地添加标点符号 (置信度 {confidence:.2f}, {elapsed:.2f}毫秒)")
+        return result
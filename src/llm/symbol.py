@@ -1,72 +1,160 @@
 from openai import OpenAI
 import dotenv
 import os
+import queue
+import threading
 from ..utils.logger import logger
+from ..utils.tracing import tracer
 
 dotenv.load_dotenv()
 
 
+def stream_completion(client, model, messages, span_name, **span_attrs):
+    """流式调用对话接口，逐块产出内容"""
+    with tracer.span(span_name, stream=True, **span_attrs):
+        response = client.chat.completions.create(
+            model=model, messages=messages, stream=True
+        )
+        first = True
+        for chunk in response:
+            if not chunk.choices:
+                continue
+            content = chunk.choices[0].delta.content
+            if content:
+                if first:
+                    tracer.event("first_token", step=span_name)
+                    first = False
+                yield content
+
+
+class StreamingText:
+    """LLM 流式输出的文本
+
+    创建时在后台线程发起请求，内容逐块放入队列；创建方（处理线程）等到首块内容或失败后返回，
+    键盘线程迭代时只读取队列，不会被网络请求阻塞，多段录音的模型调用也能同时进行。
+    迭代结束后 text 为完整文本；error 为首块之前的失败。
+    fallback 为输出中途失败时改为输入的文本：提供 recover 时在后台线程调用它生成，否则为原文。
+    """
+
+    _END = object()
+
+    def __init__(self, chunks, fallback, recover=None):
+        self.fallback = fallback
+        self.text = ""
+        self._recover = recover
+        self._queue = queue.Queue()
+        threading.Thread(
+            target=tracer.wrap(self._pump), args=(chunks,), name="llm-stream", daemon=True
+        ).start()
+        self._first = self._queue.get()
+        self.error = self._first if isinstance(self._first, Exception) else None
+
+    def _pump(self, chunks):
+        sent = False
+        try:
+            for chunk in chunks:
+                self._queue.put(chunk)
+                sent = True
+        except Exception as e:
+            if sent and self._recover is not None:
+                try:
+                    self.fallback = self._recover()
+                except Exception as recover_error:
+                    logger.warning(f"流式输出中断后重新处理失败，改为输入原文: {recover_error}")
+            self._queue.put(e)
+            return
+        self._queue.put(self._END)
+
+    def __iter__(self):
+        item = self._first
+        while item is not self._END:
+            if isinstance(item, Exception):
+                raise item
+            self.text += item
+            yield item
+            item = self._queue.get()
+
+
 class SymbolProcessor:
+    ADD_SYMBOL_PROMPT = """
+        Please add appropriate punctuation to the user’s input and return it. Apart from this, do not add or modify anything else. Do not translate the user's input. Do not add any explanation. Do not answer the user's question and so on. Just output the user's input with punctuation!
+        """
+
+    # OPTIMIZE_RESULT_PROMPT = """
+    # You are a content input optimizer.
+
+    # Since the user’s input is the result of speech recognition, there may be some obvious inaccuracies or errors.
+    # Please optimize the user’s input based on your knowledge.
+    # If the user’s speech recognition result is fine, no changes are necessary—just output it directly.
+    # Additionally, the user’s speech recognition input might lack necessary punctuation.
+    # Please add the appropriate punctuation and return the final result.
+
+    # Notice:
+    #     •	We only need to optimize the user’s input content; there is no need to answer the user’s question!!!
+    #     •	Do not add any explanation.
+    #     •	Do not add any other content.
+    #     •	Do not translate the user’s input.
+    # """
+
+    OPTIMIZE_RESULT_PROMPT = """
+        You are a speech recognition content input optimizer.
+        Please optimize the user’s input based on your knowledge.
+        And add appropriate punctuation to the user’s input.
+        Do not change the user's language.
+        Do not add any explanation.
+        Do not add answer to the user's question,just output the optimized content.
+        """
+
     def __init__(self):
         self.client = OpenAI(
             api_key=os.getenv("GROQ_API_KEY"), base_url=os.getenv("GROQ_BASE_URL")
         )
         self.model = os.getenv("GROQ_ADD_SYMBOL_MODEL", "llama3-8b-8192")
 
+    def _messages(self, system_prompt, text):
+        return [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": text},
+        ]
+
     def add_symbol(self, text):
         """为输入的文本添加合适的标点符号"""
-
-        system_prompt = """
-        Please add appropriate punctuation to the user’s input and return it. Apart from this, do not add or modify anything else. Do not translate the user's input. Do not add any explanation. Do not answer the user's question and so on. Just output the user's input with punctuation!
-        """
         try:
             logger.info(f"正在添加标点符号...")
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": text},
-                ],
-            )
+            with tracer.span("punctuation_llm"):
+                response = self.client.chat.completions.create(
+                    model=self.model,
+                    messages=self._messages(self.ADD_SYMBOL_PROMPT, text),
+                )
             return response.choices[0].message.content
         except Exception as e:
             return text, e
 
+    def add_symbol_stream(self, text):
+        """流式添加标点符号，返回 StreamingText，边生成边输入"""
+        logger.info(f"正在添加标点符号 (流式)...")
+        messages = self._messages(self.ADD_SYMBOL_PROMPT, text)
+        return StreamingText(
+            stream_completion(self.client, self.model, messages, "punctuation_llm"), text
+        )
+
     def optimize_result(self, text):
         """优化识别结果"""
-        # system_prompt = """
-        # You are a content input optimizer.
-
-        # Since the user’s input is the result of speech recognition, there may be some obvious inaccuracies or errors.
-        # Please optimize the user’s input based on your knowledge.
-        # If the user’s speech recognition result is fine, no changes are necessary—just output it directly.
-        # Additionally, the user’s speech recognition input might lack necessary punctuation.
-        # Please add the appropriate punctuation and return the final result.
-
-        # Notice:
-        #     •	We only need to optimize the user’s input content; there is no need to answer the user’s question!!!
-        #     •	Do not add any explanation.
-        #     •	Do not add any other content.
-        #     •	Do not translate the user’s input.
-        # """
-
-        system_prompt = """
-        You are a speech recognition content input optimizer.
-        Please optimize the user’s input based on your knowledge.
-        And add appropriate punctuation to the user’s input.
-        Do not change the user's language.
-        Do not add any explanation.
-        Do not add answer to the user's question,just output the optimized content.
-        """
         try:
             logger.info(f"正在优化识别结果...")
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": text},
-                ],
-            )
+            with tracer.span("optimize_llm"):
+                response = self.client.chat.completions.create(
+                    model=self.model,
+                    messages=self._messages(self.OPTIMIZE_RESULT_PROMPT, text),
+                )
             return response.choices[0].message.content
         except Exception as e:
             return text, e
+
+    def optimize_result_stream(self, text):
+        """流式优化识别结果，返回 StreamingText，边生成边输入"""
+        logger.info(f"正在优化识别结果 (流式)...")
+        messages = self._messages(self.OPTIMIZE_RESULT_PROMPT, text)
+        return StreamingText(
+            stream_completion(self.client, self.model, messages, "optimize_llm"), text
+        )
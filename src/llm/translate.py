@@ -1,20 +1,87 @@
+import hashlib
 import os
+import re
+import unicodedata
+
 import requests
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+
+from ..utils.cache import PersistentCache
+from ..utils.logger import logger
+from ..utils.tracing import tracer
 
 load_dotenv()
 
 
+class TranslationCache:
+    """归一化文本 -> 译文的缓存
+
+    常用语句每天会重复翻译很多次；键为归一化文本（NFKC、合并空白）加上模型名的哈希，
+    命中时不再请求接口。条目超过有效期后重新翻译，以便模型或提示词更新后逐步刷新。
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self.enabled = os.getenv("TRANSLATION_CACHE", "true").lower() == "true"
+        ttl_hours = float(os.getenv("TRANSLATION_CACHE_TTL_HOURS", "720"))
+        self.cache = PersistentCache(
+            "translations",
+            "翻译缓存",
+            max_items=int(os.getenv("TRANSLATION_CACHE_SIZE", "512")),
+            db_path=os.getenv("TRANSLATION_CACHE_DB") or None,
+            max_bytes=int(os.getenv("TRANSLATION_CACHE_MAX_MB", "10")) * 1024 * 1024,
+            ttl=ttl_hours * 3600 if ttl_hours > 0 else None,
+        )
+
+    @staticmethod
+    def normalize(text):
+        return re.sub(r"\s+", " ", unicodedata.normalize("NFKC", text)).strip()
+
+    def key(self, text):
+        return hashlib.sha256(
+            "\0".join((self.model, self.normalize(text))).encode("utf-8")
+        ).hexdigest()
+
+    def get_or_translate(self, text, translate):
+        """命中缓存时直接返回，否则调用 translate() 并缓存非空结果"""
+        if not self.enabled:
+            return translate()
+
+        key = self.key(text)
+        result = self.cache.get(key)
+        self.cache.log_stats(hit=result is not None)
+        if result is not None:
+            return result
+
+        result = translate()
+        if isinstance(result, str) and result:
+            self.cache.set(key, result)
+        return result
+
+
 class TranslateProcessor:
     def __init__(self):
-        self.url = "https://api.siliconflow.cn/v1/chat/completions"
-        self.headers = {
-            "Authorization": f"Bearer {os.getenv('SILICONFLOW_API_KEY')}",
-            "Content-Type": "application/json",
-        }
+        base_url = os.getenv("SILICONFLOW_BASE_URL", "https://api.siliconflow.cn/v1")
+        self.url = f"{base_url.rstrip('/')}/chat/completions"
         self.model = os.getenv("SILICONFLOW_TRANSLATE_MODEL", "THUDM/glm-4-9b-chat")
+        # 复用连接，避免每次翻译都重新建立 TCP/TLS 连接
+        self.session = requests.Session()
+        self.session.headers.update(
+            {
+                "Authorization": f"Bearer {os.getenv('SILICONFLOW_API_KEY')}",
+                "Content-Type": "application/json",
+            }
+        )
+        self.session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=4))
+        self.session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=4))
+        self.cache = TranslationCache(self.model)
 
     def translate(self, text):
+        """翻译为英文，相同文本命中缓存时不再请求"""
+        return self.cache.get_or_translate(text, lambda: self._request(text))
+
+    def _request(self, text):
         system_prompt = """
         You are a translation assistant.
         Please translate the user's input into English.
@@ -28,9 +95,8 @@ class TranslateProcessor:
             ],
         }
         try:
-            response = requests.request(
-                "POST", self.url, headers=self.headers, json=payload
-            )
+            with tracer.span("translation_llm"):
+                response = self.session.post(self.url, json=payload)
             return (
                 response.json()
                 .get("choices", [{}])[0]
@@ -38,4 +104,5 @@ class TranslateProcessor:
                 .get("content", "")
             )
         except Exception as e:
+            logger.error(f"翻译失败: {e}")
             return text, e
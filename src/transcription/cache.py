@@ -0,0 +1,51 @@
+import hashlib
+import os
+
+from ..utils.cache import PersistentCache
+
+
+class TranscriptionCache:
+    """按内容寻址的转录结果缓存
+
+    键为上传数据本身的哈希加上模式、模型和提示词，同一段音频重试或重复提交时
+    只调用一次接口。直接对编码后的字节计算哈希，不为生成键而解码、重采样整段录音。
+    实时听写中几乎不会出现完全相同的录音，默认关闭。
+    """
+
+    def __init__(self):
+        self.enabled = os.getenv("TRANSCRIPTION_CACHE", "false").lower() == "true"
+        self.cache = PersistentCache(
+            "transcriptions",
+            "转录缓存",
+            max_items=int(os.getenv("TRANSCRIPTION_CACHE_SIZE", "256")),
+            db_path=os.getenv("TRANSCRIPTION_CACHE_DB") or None,
+            max_bytes=int(os.getenv("TRANSCRIPTION_CACHE_MAX_MB", "50")) * 1024 * 1024,
+        )
+
+    def _audio_digest(self, audio_buffer):
+        """计算上传数据的哈希，读取后把缓冲区指针复位"""
+        digest = hashlib.sha256(audio_buffer.read()).hexdigest()
+        audio_buffer.seek(0)
+        return digest
+
+    def key(self, audio_buffer, mode, model, prompt):
+        digest = self._audio_digest(audio_buffer)
+        return hashlib.sha256(
+            "\0".join((digest, mode, model or "", prompt or "")).encode("utf-8")
+        ).hexdigest()
+
+    def get_or_transcribe(self, audio_buffer, mode, model, prompt, transcribe):
+        """命中缓存时直接返回，否则调用 transcribe() 并缓存非空结果"""
+        if not self.enabled:
+            return transcribe()
+
+        key = self.key(audio_buffer, mode, model, prompt)
+        result = self.cache.get(key)
+        self.cache.log_stats(hit=result is not None)
+        if result is not None:
+            return result
+
+        result = transcribe()
+        if result:
+            self.cache.set(key, result)
+        return result
@@ -0,0 +1,158 @@
+import io
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+
+import numpy as np
+
+from ..utils.deadline import request_tracker
+from ..utils.logger import logger
+from ..utils.tracing import tracer
+from .process import run_process_audio
+
+
+class HedgedProcessor:
+    """对冲请求：主后端迟迟不返回时，向备用后端再发一份
+
+    先只请求主后端；若超过主后端近期延迟的分位数仍未返回，再把同一段音频发给
+    备用后端，取先成功返回的结果并取消另一方。主后端出错时立即改用备用后端。
+    只有少数慢请求会多发一次，尾部延迟却由两者中较快的一方决定。
+
+    落败一方若仍在上传，读取下一块时即中止；若已在等待响应，则无法从外部打断，
+    要到它自己的截止时间（读取超时已收紧到剩余时间）才返回。因此每个请求使用
+    单独的线程，而不是固定大小的线程池，滞留的落败请求不会占满工作线程。
+    """
+
+    PERCENTILE = 95  # 对冲延迟取主后端延迟的分位数
+    DEFAULT_DELAY = 2.0  # 延迟样本不足时的对冲延迟（秒）
+    MIN_SAMPLES = 5  # 计算分位数所需的最少样本数
+    WINDOW = 50  # 保留的延迟样本数
+
+    supports_streaming = False
+
+    def __init__(self, primary, secondary):
+        self.primary = primary
+        self.secondary = secondary
+        self.percentile = float(os.getenv("HEDGE_PERCENTILE", self.PERCENTILE))
+        self.default_delay = float(os.getenv("HEDGE_DEFAULT_DELAY", self.DEFAULT_DELAY))
+        self.timeout_seconds = max(primary.timeout_seconds, secondary.timeout_seconds)
+        self.latencies = deque(maxlen=self.WINDOW)  # 主后端最近的成功延迟
+        self.hedged = 0  # 发出对冲请求的次数
+        self.secondary_wins = 0  # 备用后端胜出的次数
+
+    def hedge_delay(self):
+        """当前的对冲延迟（秒）"""
+        if len(self.latencies) < self.MIN_SAMPLES:
+            return self.default_delay
+        return float(np.percentile(self.latencies, self.percentile))
+
+    def _run(self, processor, data, name, mode, prompt, cancel_event):
+        """在工作线程中调用后端；cancel_event 被设置时中止该后端的请求"""
+        audio_buffer = io.BytesIO(data)
+        audio_buffer.name = name
+        start = time.perf_counter()
+        with request_tracker.cancel_scope(cancel_event):
+            result = processor.transcribe(audio_buffer, mode, prompt)
+        if processor is self.primary:
+            self.latencies.append(time.perf_counter() - start)
+        return result
+
+    def _submit(self, processor, data, name, mode, prompt):
+        """在单独的线程中请求后端，返回 Future"""
+        future = Future()
+        future.cancel_event = threading.Event()
+        run = tracer.wrap(self._run)
+
+        def target():
+            if not future.set_running_or_notify_cancel():
+                return
+            try:
+                future.set_result(
+                    run(processor, data, name, mode, prompt, future.cancel_event)
+                )
+            except Exception as e:
+                future.set_exception(e)
+
+        threading.Thread(target=target, name="hedge", daemon=True).start()
+        return future
+
+    @staticmethod
+    def _succeeded(future):
+        return future.exception() is None and bool(future.result())
+
+    def transcribe_with(self, audio_buffer, mode="transcriptions", prompt=""):
+        """对冲地获取原始识别文本
+
+        Returns:
+            tuple: (原始文本, 胜出的处理器)
+        """
+        data = audio_buffer.getvalue()
+        name = getattr(audio_buffer, "name", "audio.wav")
+        delay = self.hedge_delay()
+        deadline = time.monotonic() + self.timeout_seconds
+
+        futures = {self._submit(self.primary, data, name, mode, prompt): self.primary}
+        done, _ = wait(futures, timeout=delay)
+        primary_future = next(iter(futures))
+        if primary_future in done and self._succeeded(primary_future):
+            return primary_future.result(), self.primary
+
+        self.hedged += 1
+        reason = "出错" if done else f"{delay:.2f}秒内未返回"
+        logger.info(f"主后端{reason}，发出对冲请求 (累计 {self.hedged} 次)")
+        futures[self._submit(self.secondary, data, name, mode, prompt)] = self.secondary
+
+        pending = set(futures) - done
+        error = primary_future.exception() if primary_future in done else None
+        try:
+            while pending:
+                done, pending = wait(
+                    pending,
+                    timeout=max(deadline - time.monotonic(), 0),
+                    return_when=FIRST_COMPLETED,
+                )
+                if not done:
+                    raise TimeoutError(f"操作超时 ({self.timeout_seconds}秒)")
+                for future in done:
+                    if self._succeeded(future):
+                        winner = futures[future]
+                        if winner is self.secondary:
+                            self.secondary_wins += 1
+                        logger.info(
+                            f"对冲请求由{'备用' if winner is self.secondary else '主'}后端胜出 "
+                            f"(备用胜出 {self.secondary_wins}/{self.hedged})"
+                        )
+                        return future.result(), winner
+                    error = future.exception() or error
+            if error is not None:
+                raise error
+            return "", self.primary
+        finally:
+            # 取消仍在进行的一方：未开始的直接撤销，上传中的在读取下一块时中止，
+            # 已在等待响应的到自己的截止时间返回
+            for future in pending:
+                future.cancel_event.set()
+                future.cancel()
+
+    def transcribe(self, audio_buffer, mode="transcriptions", prompt=""):
+        """对冲地获取原始识别文本（不做后处理）"""
+        return self.transcribe_with(audio_buffer, mode, prompt)[0]
+
+    def post_process(self, result, mode):
+        """按主后端的方式做后处理（分段转录拼接后的文本使用）"""
+        return self.primary.post_process(result, mode)
+
+    def process_audio(self, audio_buffer, mode="transcriptions", prompt=""):
+        """对冲地处理音频，由胜出的后端做后处理
+
+        Returns:
+            tuple: (结果文本, 错误信息)
+        """
+        logger.info(
+            f"正在调用对冲请求... (模式: {mode}, 对冲延迟: {self.hedge_delay():.2f}秒)"
+        )
+        return run_process_audio(
+            self.transcribe_with, audio_buffer, mode, prompt, self.timeout_seconds
+        )
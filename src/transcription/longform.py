@@ -0,0 +1,148 @@
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import soundfile as sf
+
+from ..audio.encoder import AudioEncoder
+from ..audio.vad import VoiceActivityDetector
+from ..utils.logger import logger
+from ..utils.tracing import tracer
+from .process import run_process_audio
+
+
+class LongFormProcessor:
+    """长录音分段并行转录
+
+    包装任意转录处理器：录音超过阈值时，在静音处把音频切成若干段，
+    通过有限大小的线程池并行调用接口，再按顺序拼接文本并统一做后处理。
+    短录音直接交给被包装的处理器。
+    """
+
+    MIN_SECONDS = 45  # 超过该时长才分段（秒）
+    CHUNK_SECONDS = 30  # 目标分段时长（秒）
+    SEARCH_SECONDS = 8  # 在目标切点之前多长范围内寻找静音（秒）
+    OVERLAP_SECONDS = 1.0  # 找不到静音时硬切，相邻两段重叠的时长（秒）
+    MAX_WORKERS = 4  # 并行请求数上限
+    SMOOTH_MS = 300  # 寻找切点时能量平滑窗口（毫秒）
+    MAX_SEAM_CHARS = 20  # 拼接重叠段时最多比对的字符数
+
+    # 边录边传会把整段录音作为一个请求上传，无法分段，因此启用分段时不使用
+    supports_streaming = False
+
+    def __init__(self, processor):
+        self.processor = processor
+        self.min_seconds = float(os.getenv("LONGFORM_MIN_SECONDS", self.MIN_SECONDS))
+        self.chunk_seconds = float(
+            os.getenv("LONGFORM_CHUNK_SECONDS", self.CHUNK_SECONDS)
+        )
+        self.executor = ThreadPoolExecutor(
+            max_workers=int(os.getenv("LONGFORM_MAX_WORKERS", self.MAX_WORKERS)),
+            thread_name_prefix="longform",
+        )
+        self.vad = VoiceActivityDetector()
+        self.encoder = AudioEncoder()
+
+    def __getattr__(self, name):
+        # 其余属性（如超时时长）透传给被包装的处理器
+        return getattr(self.processor, name)
+
+    def split(self, audio, sample_rate):
+        """在静音处切分音频
+
+        Returns:
+            list: [(起始采样点, 结束采样点, 是否与下一段重叠), ...]
+        """
+        mask, frame_len = self.vad.speech_mask(audio, sample_rate)
+        energy, _ = self.vad.frame_energy(audio, sample_rate)
+        smooth_frames = max(1, self.SMOOTH_MS // self.vad.FRAME_MS)
+        smooth = np.convolve(energy, np.ones(smooth_frames) / smooth_frames, mode="same")
+
+        chunk_frames = int(self.chunk_seconds * 1000 / self.vad.FRAME_MS)
+        search_frames = int(self.SEARCH_SECONDS * 1000 / self.vad.FRAME_MS)
+        overlap = int(self.OVERLAP_SECONDS * sample_rate)
+
+        segments = []
+        start = 0
+        while len(energy) - start > chunk_frames:
+            target = start + chunk_frames
+            low = max(target - search_frames, start + 1)
+            cut = low + int(np.argmin(smooth[low:target]))
+            if mask[cut]:
+                # 附近没有静音，硬切并与下一段重叠，拼接时去重
+                end = min(target * frame_len + overlap, len(audio))
+                segments.append((start * frame_len, end, True))
+                start = target
+            else:
+                segments.append((start * frame_len, cut * frame_len, False))
+                start = cut
+        segments.append((start * frame_len, len(audio), False))
+        return segments
+
+    @classmethod
+    def _join(cls, left, right, overlapped):
+        """拼接相邻两段文本，重叠段去掉重复的部分"""
+        if not left or not right:
+            return left or right
+        if overlapped:
+            for k in range(min(len(left), len(right), cls.MAX_SEAM_CHARS), 1, -1):
+                if left[-k:] == right[:k]:
+                    return left + right[k:]
+        # 两侧都是拉丁字母/数字时补一个空格
+        if re.match(r"\w", left[-1], re.ASCII) and re.match(r"\w", right[0], re.ASCII):
+            return f"{left} {right}"
+        return left + right
+
+    def _transcribe_segment(self, audio, sample_rate, mode, prompt):
+        audio_buffer = self.encoder.encode(audio, sample_rate)
+        try:
+            return self.processor.transcribe(audio_buffer, mode, prompt).strip()
+        finally:
+            audio_buffer.close()
+
+    def process_audio(self, audio_buffer, mode="transcriptions", prompt=""):
+        """处理音频，长录音分段并行转录
+
+        Returns:
+            tuple: (结果文本, 错误信息)
+        """
+        duration = sf.info(audio_buffer).duration
+        audio_buffer.seek(0)
+        if duration < self.min_seconds:
+            return self.processor.process_audio(audio_buffer, mode, prompt)
+
+        return run_process_audio(
+            self._transcribe_segments,
+            audio_buffer,
+            mode,
+            prompt,
+            self.processor.timeout_seconds,
+            name="长录音处理",
+        )
+
+    def _transcribe_segments(self, audio_buffer, mode, prompt):
+        """分段并行转录并拼接，返回 (原始文本, 负责后处理的处理器)"""
+        audio, sample_rate = sf.read(audio_buffer, dtype="int16")
+        segments = self.split(audio, sample_rate)
+        duration = len(audio) / sample_rate
+        logger.info(
+            f"长录音 {duration:.1f}秒，分为 {len(segments)} 段并行转录 (模式: {mode})"
+        )
+
+        futures = [
+            self.executor.submit(
+                tracer.wrap(self._transcribe_segment),
+                audio[start:end],
+                sample_rate,
+                mode,
+                prompt,
+            )
+            for start, end, _ in segments
+        ]
+        result = ""
+        previous_overlapped = False
+        for future, (_, _, overlapped) in zip(futures, segments):
+            result = self._join(result, future.result(), previous_overlapped)
+            previous_overlapped = overlapped
+        return result, self.processor
@@ -0,0 +1,57 @@
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from ..utils.logger import logger
+
+
+class TranscriptionPipeline:
+    """异步处理流水线
+
+    录音结束后把处理任务放入线程池并立即返回，键盘监听线程不再被网络请求阻塞；
+    多段录音可以并发转录，结果由单独的输出线程按录音顺序依次交付。
+    """
+
+    MAX_WORKERS = 2  # 同时处理的录音数上限
+
+    def __init__(self, on_result, max_workers=None):
+        """
+        Args:
+            on_result: 结果回调 on_result((文本, 错误信息))，在输出线程中按顺序调用
+            max_workers: 工作线程数
+        """
+        self.on_result = on_result
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers
+            or int(os.getenv("PIPELINE_MAX_WORKERS", self.MAX_WORKERS)),
+            thread_name_prefix="pipeline",
+        )
+        self._futures = queue.Queue()  # 按提交顺序排列的任务
+        threading.Thread(target=self._deliver, daemon=True).start()
+
+    @property
+    def pending(self):
+        """尚未交付结果的任务数"""
+        return self._futures.qsize()
+
+    def submit(self, func, *args, **kwargs):
+        """提交一个处理任务，func 应返回 (文本, 错误信息)"""
+        future = self.executor.submit(func, *args, **kwargs)
+        self._futures.put(future)
+        logger.info(f"已提交处理任务，待输出 {self.pending} 个")
+        return future
+
+    def _deliver(self):
+        """按提交顺序等待并交付结果"""
+        while True:
+            future = self._futures.get()
+            try:
+                result = future.result()
+            except Exception as e:
+                logger.error(f"处理任务失败: {e}", exc_info=True)
+                result = (None, f"❌ {str(e)}")
+            try:
+                self.on_result(result)
+            except Exception as e:
+                logger.error(f"输出结果失败: {e}", exc_info=True)
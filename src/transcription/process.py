@@ -0,0 +1,42 @@
+import time
+
+from ..utils.deadline import request_tracker
+from ..utils.logger import logger
+
+
+def run_process_audio(
+    transcribe_with, audio_buffer, mode, prompt, timeout_seconds, name="音频处理"
+):
+    """包装处理器（路由、对冲、长录音分段）共用的 process_audio 流程
+
+    转录后由实际给出结果的后端做后处理，异常转换为错误信息，最后关闭音频流。
+
+    Args:
+        transcribe_with: 调用方式为 transcribe_with(audio_buffer, mode, prompt)，
+            返回 (原始文本, 负责后处理的处理器)
+        audio_buffer: 音频数据
+        mode: transcriptions / translations
+        prompt: 提示词
+        timeout_seconds: 超时时长，用于错误信息
+        name: 日志中的处理名称
+
+    Returns:
+        tuple: (结果文本, 错误信息)
+    """
+    try:
+        start_time = time.time()
+        result, processor = transcribe_with(audio_buffer, mode, prompt)
+        logger.info(f"{name}完成 ({mode}), 耗时: {time.time() - start_time:.1f}秒")
+        return processor.post_process(result, mode), None
+
+    except TimeoutError:
+        error_msg = f"❌ API 请求超时 ({timeout_seconds}秒)"
+        logger.error(error_msg)
+        request_tracker.log_stats()
+        return None, error_msg
+    except Exception as e:
+        error_msg = f"❌ {str(e)}"
+        logger.error(f"{name}错误: {str(e)}", exc_info=True)
+        return None, error_msg
+    finally:
+        audio_buffer.close()
@@ -0,0 +1,205 @@
+import os
+import threading
+import time
+
+import soundfile as sf
+
+from ..utils.logger import logger
+from .process import run_process_audio
+
+
+class BackendStats:
+    """单个后端的延迟、错误率与熔断状态"""
+
+    def __init__(self, name, processor, alpha, breaker_threshold, breaker_cooldown):
+        self.name = name
+        self.processor = processor
+        self.alpha = alpha
+        self.breaker_threshold = breaker_threshold
+        self.breaker_cooldown = breaker_cooldown
+        self.latency = {}  # 时长分档 -> 延迟 EWMA（秒）
+        self.error_rate = 0.0  # 失败率 EWMA
+        self.requests = 0
+        self.timeouts = 0
+        self.consecutive_timeouts = 0
+        self.open_until = 0.0  # 熔断打开到何时（monotonic）
+        self.probing = False  # 半开状态下是否已有试探请求
+
+    def _ewma(self, old, value):
+        return value if old is None else old + self.alpha * (value - old)
+
+    def state(self, now):
+        """熔断状态：closed / open / half-open"""
+        if self.open_until == 0.0:
+            return "closed"
+        return "open" if now < self.open_until else "half-open"
+
+    def available(self, now):
+        state = self.state(now)
+        return state == "closed" or (state == "half-open" and not self.probing)
+
+    def expected_latency(self, bucket):
+        """预计延迟，按失败率放大；该档位还没有样本时返回 0 以便先试探一次"""
+        latency = self.latency.get(bucket)
+        if latency is None:
+            return 0.0
+        return latency / max(1.0 - self.error_rate, 0.05)
+
+    def record(self, bucket, latency, error=None):
+        self.requests += 1
+        self.probing = False
+        self.error_rate = self._ewma(self.error_rate, 0.0 if error is None else 1.0)
+        if isinstance(error, TimeoutError):
+            # 超时按截止时长计入延迟，避免慢后端看起来比实际更快
+            latency = max(latency, self.processor.timeout_seconds)
+            self.latency[bucket] = self._ewma(self.latency.get(bucket), latency)
+            self.timeouts += 1
+            self.consecutive_timeouts += 1
+            if self.consecutive_timeouts >= self.breaker_threshold or self.open_until:
+                self.open_until = time.monotonic() + self.breaker_cooldown
+                logger.warning(
+                    f"{self.name} 连续超时 {self.consecutive_timeouts} 次，"
+                    f"熔断 {self.breaker_cooldown:.0f}秒"
+                )
+            return
+        self.consecutive_timeouts = 0
+        if error is None:
+            self.latency[bucket] = self._ewma(self.latency.get(bucket), latency)
+            self.open_until = 0.0
+
+
+class AdaptiveRouter:
+    """按延迟自适应选择转录后端
+
+    为每个后端按录音时长分档记录延迟 EWMA、失败率和超时次数，
+    每段录音交给预计最快的后端；失败时依次改用其余后端。
+    连续超时的后端会被熔断一段时间，冷却后只放行一个试探请求，成功才恢复。
+    """
+
+    BUCKETS = (10, 30, 60)  # 录音时长分档上界（秒），超过最后一档归入同一档
+    ALPHA = 0.3  # EWMA 平滑系数
+    BREAKER_THRESHOLD = 3  # 连续超时多少次触发熔断
+    BREAKER_COOLDOWN = 30  # 熔断持续时间（秒）
+
+    supports_streaming = False
+
+    def __init__(self, processors):
+        """
+        Args:
+            processors: {平台名称: 处理器}，顺序即无统计数据时的优先级
+        """
+        assert processors, "至少需要一个转录后端"
+        alpha = float(os.getenv("ROUTER_ALPHA", self.ALPHA))
+        threshold = int(os.getenv("ROUTER_BREAKER_THRESHOLD", self.BREAKER_THRESHOLD))
+        cooldown = float(os.getenv("ROUTER_BREAKER_COOLDOWN", self.BREAKER_COOLDOWN))
+        self.backends = [
+            BackendStats(name, processor, alpha, threshold, cooldown)
+            for name, processor in processors.items()
+        ]
+        self.timeout_seconds = max(b.processor.timeout_seconds for b in self.backends)
+        self._lock = threading.Lock()
+
+    def bucket(self, duration):
+        for upper in self.BUCKETS:
+            if duration < upper:
+                return upper
+        return None
+
+    @staticmethod
+    def _bucket_label(bucket):
+        return f"<{bucket}s" if bucket is not None else "长"
+
+    def rank(self, bucket):
+        """按预计延迟排序的候选后端；熔断中的后端排在最后作为兜底"""
+        now = time.monotonic()
+        with self._lock:
+            available = sorted(
+                (b for b in self.backends if b.available(now)),
+                key=lambda b: b.expected_latency(bucket),
+            )
+            blocked = sorted(
+                (b for b in self.backends if not b.available(now)),
+                key=lambda b: b.open_until,
+            )
+            if available and available[0].state(now) == "half-open":
+                available[0].probing = True
+            return available + blocked
+
+    def _record(self, backend, bucket, latency, error=None):
+        with self._lock:
+            backend.record(bucket, latency, error)
+
+    def transcribe_with(self, audio_buffer, mode="transcriptions", prompt=""):
+        """选择后端获取原始识别文本，失败时依次尝试其余后端
+
+        Returns:
+            tuple: (原始文本, 使用的处理器)
+        """
+        duration = sf.info(audio_buffer).duration
+        audio_buffer.seek(0)
+        bucket = self.bucket(duration)
+
+        error = None
+        for backend in self.rank(bucket):
+            audio_buffer.seek(0)
+            start = time.perf_counter()
+            try:
+                result = backend.processor.transcribe(audio_buffer, mode, prompt)
+            except Exception as e:
+                self._record(backend, bucket, time.perf_counter() - start, e)
+                logger.warning(f"{backend.name} 转录失败，尝试其他后端: {e}")
+                error = e
+                continue
+            self._record(backend, bucket, time.perf_counter() - start)
+            logger.info(
+                f"已路由到 {backend.name} (时长 {duration:.1f}秒, "
+                f"耗时 {time.perf_counter() - start:.2f}秒)"
+            )
+            self.log_table()
+            return result, backend.processor
+        self.log_table()
+        raise error
+
+    def transcribe(self, audio_buffer, mode="transcriptions", prompt=""):
+        """选择后端获取原始识别文本（不做后处理）"""
+        return self.transcribe_with(audio_buffer, mode, prompt)[0]
+
+    def post_process(self, result, mode):
+        """按首选后端的方式做后处理（分段转录拼接后的文本使用）"""
+        return self.backends[0].processor.post_process(result, mode)
+
+    def routing_table(self):
+        """各后端的统计快照"""
+        now = time.monotonic()
+        with self._lock:
+            return [
+                {
+                    "backend": b.name,
+                    "state": b.state(now),
+                    "latency": {
+                        self._bucket_label(k): round(v, 2) for k, v in b.latency.items()
+                    },
+                    "error_rate": round(b.error_rate, 2),
+                    "requests": b.requests,
+                    "timeouts": b.timeouts,
+                }
+                for b in self.backends
+            ]
+
+    def log_table(self):
+        for row in self.routing_table():
+            latency = ", ".join(f"{k}: {v}秒" for k, v in row["latency"].items())
+            logger.info(
+                f"路由表 {row['backend']}: 状态 {row['state']}, 延迟 [{latency or '无数据'}], "
+                f"失败率 {row['error_rate']:.0%}, 请求 {row['requests']}, 超时 {row['timeouts']}"
+            )
+
+    def process_audio(self, audio_buffer, mode="transcriptions", prompt=""):
+        """路由并处理音频，由实际使用的后端做后处理
+
+        Returns:
+            tuple: (结果文本, 错误信息)
+        """
+        return run_process_audio(
+            self.transcribe_with, audio_buffer, mode, prompt, self.timeout_seconds
+        )
@@ -1,52 +1,29 @@
 import os
 import threading
 import time
-from functools import wraps
 
 import dotenv
 import httpx
 
 from src.llm.translate import TranslateProcessor
+from .cache import TranscriptionCache
+from .streaming import StreamingUpload
+from ..utils.chinese_convert import get_converter
+from ..utils.deadline import request_tracker
 from ..utils.logger import logger
+from ..utils.tracing import tracer
 
 dotenv.load_dotenv()
 
 
-def timeout_decorator(seconds):
-    def decorator(func):
-        @wraps(func)
-        def wrapper(*args, **kwargs):
-            result = [None]
-            error = [None]
-            completed = threading.Event()
-
-            def target():
-                try:
-                    result[0] = func(*args, **kwargs)
-                except Exception as e:
-                    error[0] = e
-                finally:
-                    completed.set()
-
-            thread = threading.Thread(target=target)
-            thread.daemon = True
-            thread.start()
-
-            if completed.wait(seconds):
-                if error[0] is not None:
-                    raise error[0]
-                return result[0]
-            raise TimeoutError(f"操作超时 ({seconds}秒)")
-
-        return wrapper
-
-    return decorator
-
-
 class SenseVoiceSmallProcessor:
     # 类级别的配置参数
-    DEFAULT_TIMEOUT = 20  # API 超时时间（秒）
+    DEFAULT_TIMEOUT = 10  # API 超时时间（秒）
     DEFAULT_MODEL = "FunAudioLLM/SenseVoiceSmall"
+    BASE_URL = "https://api.siliconflow.cn/v1"
+    KEEPALIVE_INTERVAL = 30  # 空闲时保持连接的心跳间隔（秒）
+    KEEPALIVE_EXPIRY = 300  # 连接池中空闲连接的保留时间（秒），与心跳间隔无关
+    supports_streaming = True  # 支持边录边传
 
     def __init__(self):
         api_key = os.getenv("SILICONFLOW_API_KEY")
@@ -55,32 +32,142 @@ class SenseVoiceSmallProcessor:
         self.convert_to_simplified = (
             os.getenv("CONVERT_TO_SIMPLIFIED", "false").lower() == "true"
         )
-        # self.cc = OpenCC('t2s') if self.convert_to_simplified else None
+        self.cc = get_converter("t2s") if self.convert_to_simplified else None
         # self.symbol = SymbolProcessor()
         # self.add_symbol = os.getenv("ADD_SYMBOL", "false").lower() == "true"
         # self.optimize_result = os.getenv("OPTIMIZE_RESULT", "false").lower() == "true"
         self.timeout_seconds = self.DEFAULT_TIMEOUT
         self.translate_processor = TranslateProcessor()
+        self.cache = TranscriptionCache()
+
+        # 长连接池：复用 TCP/TLS 连接，避免每次录音都重新握手
+        self.keepalive_interval = float(
+            os.getenv("SILICONFLOW_KEEPALIVE_INTERVAL", self.KEEPALIVE_INTERVAL)
+        )
+        self.client = httpx.Client(
+            base_url=os.getenv("SILICONFLOW_BASE_URL", self.BASE_URL),
+            headers={"Authorization": f"Bearer {api_key}"},
+            timeout=self.DEFAULT_TIMEOUT,
+            limits=httpx.Limits(
+                max_connections=4,
+                max_keepalive_connections=2,
+                # 关闭心跳时也保留空闲连接，由服务端决定何时断开
+                keepalive_expiry=max(self.KEEPALIVE_EXPIRY, self.keepalive_interval * 2),
+            ),
+            # 请求体发送完毕后按剩余时间收紧读取超时
+            event_hooks={"request": [request_tracker.bind_request]},
+        )
+        self.last_timings = {}  # 最近一次请求的分段耗时
+        self._last_activity = 0.0
+        self._start_keepalive()
+
+    def _warm_up(self):
+        """预热连接：发送轻量请求以建立并保持 TCP/TLS 连接"""
+        try:
+            self.client.head("/models")
+            self._last_activity = time.time()
+        except Exception as e:
+            logger.warning(f"预热连接失败: {e}")
+
+    def _start_keepalive(self):
+        """启动后台线程：启动时预热连接（始终进行），空闲时定期发送心跳保持连接"""
+
+        def keepalive():
+            self._warm_up()
+            logger.info("硅基流动 API 连接已预热")
+            if self.keepalive_interval <= 0:
+                return  # 心跳已关闭，只预热一次
+            while True:
+                time.sleep(self.keepalive_interval)
+                if time.time() - self._last_activity >= self.keepalive_interval:
+                    self._warm_up()
+
+        threading.Thread(target=keepalive, daemon=True).start()
+
+    @staticmethod
+    def _request_tracer(events):
+        """创建 httpx trace 回调，记录各阶段事件的时间戳"""
+
+        def trace(event_name, info):
+            # 事件名形如 "connection.connect_tcp.started" / "http11.send_request_body.complete"
+            events[event_name.split(".", 1)[-1]] = time.perf_counter()
+
+        return trace
+
+    @staticmethod
+    def _split_timings(start, events, end):
+        """将 trace 事件换算为 连接/上传/服务端 三段耗时（秒）"""
+        connect_start = events.get("connect_tcp.started")
+        connect_end = events.get("start_tls.complete", events.get("connect_tcp.complete"))
+        connect = connect_end - connect_start if connect_start and connect_end else 0.0
+        upload_start = events.get("send_request_headers.started", start)
+        upload_end = events.get("send_request_body.complete", upload_start)
+        response_start = events.get("receive_response_headers.complete", end)
+        return {
+            "connect": connect,
+            "upload": upload_end - upload_start,
+            "server": response_start - upload_end,
+            "total": end - start,
+        }
 
     def _convert_traditional_to_simplified(self, text):
         """将繁体中文转换为简体中文"""
         if not self.convert_to_simplified or not text:
             return text
-        return self.cc.convert(text)
+        with tracer.span("opencc"):
+            return self.cc.convert(text)
 
-    @timeout_decorator(10)
     def _call_api(self, audio_data):
         """调用硅流 API"""
-        transcription_url = "https://api.siliconflow.cn/v1/audio/transcriptions"
-
-        files = {"file": ("audio.wav", audio_data), "model": (None, self.DEFAULT_MODEL)}
-
-        headers = {"Authorization": f"Bearer {os.getenv('SILICONFLOW_API_KEY')}"}
+        filename = getattr(audio_data, "name", "audio.wav")
+
+        events = {}
+        start = time.perf_counter()
+        with request_tracker.track("硅基流动转录", self.timeout_seconds) as deadline:
+            files = {
+                "file": (filename, deadline.wrap(audio_data)),
+                "model": (None, self.DEFAULT_MODEL),
+            }
+            response = self.client.post(
+                "/audio/transcriptions",
+                files=files,
+                timeout=deadline.httpx_timeout(),
+                extensions={"trace": self._request_tracer(events)},
+            )
+        self._last_activity = time.time()
+        self.last_timings = self._split_timings(start, events, time.perf_counter())
+        logger.info(
+            "请求分段耗时: 连接 {connect:.3f}秒, 上传 {upload:.3f}秒, 服务端 {server:.3f}秒".format(
+                **self.last_timings
+            )
+        )
+        response.raise_for_status()
+        return response.json().get("text", "获取失败")
+
+    def transcribe(self, audio_buffer, mode="transcriptions", prompt=""):
+        """调用 API 获取原始识别文本（不做后处理），相同音频命中缓存时不再请求"""
+        return self.cache.get_or_transcribe(
+            audio_buffer,
+            mode,
+            self.DEFAULT_MODEL,
+            prompt,
+            lambda: self._call_api(audio_buffer),
+        )
 
-        with httpx.Client() as client:
-            response = client.post(transcription_url, files=files, headers=headers)
-            response.raise_for_status()
-            return response.json().get("text", "获取失败")
+    def post_process(self, result, mode):
+        """对识别结果做后处理（翻译等）"""
+        result = self._convert_traditional_to_simplified(result)
+        if mode == "translations":
+            result = self.translate_processor.translate(result)
+        logger.info(f"识别结果: {result}")
+
+        # if self.add_symbol:
+        #     result = self.symbol.add_symbol(result)
+        #     logger.info(f"添加标点符号: {result}")
+        # if self.optimize_result:
+        #     result = self.symbol.optimize_result(result)
+        #     logger.info(f"优化结果: {result}")
+        return result
 
     def process_audio(self, audio_buffer, mode="transcriptions", prompt=""):
         """处理音频（转录或翻译）
@@ -98,28 +185,17 @@ class SenseVoiceSmallProcessor:
             start_time = time.time()
 
             logger.info(f"正在调用 硅基流动 API... (模式: {mode})")
-            result = self._call_api(audio_buffer)
+            result = self.transcribe(audio_buffer, mode, prompt)
 
             logger.info(
                 f"API 调用成功 ({mode}), 耗时: {time.time() - start_time:.1f}秒"
             )
-            # result = self._convert_traditional_to_simplified(result)
-            if mode == "translations":
-                result = self.translate_processor.translate(result)
-            logger.info(f"识别结果: {result}")
-
-            # if self.add_symbol:
-            #     result = self.symbol.add_symbol(result)
-            #     logger.info(f"添加标点符号: {result}")
-            # if self.optimize_result:
-            #     result = self.symbol.optimize_result(result)
-            #     logger.info(f"优化结果: {result}")
-
-            return result, None
+            return self.post_process(result, mode), None
 
         except TimeoutError:
             error_msg = f"❌ API 请求超时 ({self.timeout_seconds}秒)"
             logger.error(error_msg)
+            request_tracker.log_stats()
             return None, error_msg
         except Exception as e:
             error_msg = f"❌ {str(e)}"
@@ -127,3 +203,50 @@ class SenseVoiceSmallProcessor:
             return None, error_msg
         finally:
             audio_buffer.close()  # 显式关闭字节流
+
+    def create_stream_upload(self):
+        """创建边录边传的上传任务，由录音回调持续推入音频块"""
+        return StreamingUpload(
+            self.client,
+            "/audio/transcriptions",
+            {"model": self.DEFAULT_MODEL},
+            self.timeout_seconds,
+        )
+
+    def process_stream(self, upload, encode_audio, mode="transcriptions", prompt=""):
+        """等待流式上传的结果并处理
+
+        流式上传失败（非超时）时，回退为使用完整录音调用 process_audio。
+
+        Args:
+            upload: create_stream_upload 创建并已开始的上传任务
+            encode_audio: 返回完整录音字节流的函数，仅在回退时调用
+            mode: 'transcriptions' 或 'translations'
+
+        Returns:
+            tuple: (结果文本, 错误信息)
+        """
+        try:
+            start_time = time.time()
+            logger.info(f"等待流式上传结果... (模式: {mode})")
+            response = upload.finish(self.timeout_seconds)
+            self._last_activity = time.time()
+            response.raise_for_status()
+            result = response.json().get("text", "获取失败")
+            logger.info(
+                f"API 调用成功 ({mode}), 松开按键后耗时: {time.time() - start_time:.1f}秒, "
+                f"已上传 {upload.bytes_sent} 字节"
+            )
+            return self.post_process(result, mode), None
+        except TimeoutError:
+            error_msg = f"❌ API 请求超时 ({self.timeout_seconds}秒)"
+            logger.error(error_msg)
+            request_tracker.log_stats()
+            return None, error_msg
+        except Exception as e:
+            logger.warning(f"流式上传失败，回退为完整上传: {e}")
+            return self.process_audio(encode_audio(), mode, prompt)
+
+    def close(self):
+        """关闭连接池"""
+        self.client.close()
@@ -0,0 +1,158 @@
+import queue
+import struct
+import threading
+import uuid
+
+import numpy as np
+
+from ..audio.resample import PolyphaseResampler, StreamingResampler, to_int16
+from ..utils.deadline import request_tracker
+from ..utils.logger import logger
+from ..utils.tracing import tracer
+
+
+class StreamingUpload:
+    """边录边传：录音过程中将音频块编码为 PCM 并以分块传输方式上传
+
+    录音回调通过 feed() 推入音频块，后台线程逐块重采样到目标采样率后持续写入同一个
+    multipart 请求体；松开按键后只剩最后一小段需要发送。
+    """
+
+    STREAMING_SIZE = 0xFFFFFFFF  # 流式 WAV 头中未知长度的约定值
+
+    def __init__(self, client, url, fields, timeout, filename="audio.wav"):
+        self.client = client
+        self.url = url
+        self.fields = fields
+        self.timeout = timeout
+        self.filename = filename
+        self.deadline = None
+        self.sample_rate = None
+        self._resampler = None
+        self.bytes_sent = 0
+        self._queue = queue.Queue()
+        self._boundary = uuid.uuid4().hex
+        self._cancelled = False
+        self._done = threading.Event()
+        self._response = None
+        self._error = None
+
+    def feed(self, chunk):
+        """推入一段 float32 音频（在音频回调线程中调用，只做入队）"""
+        self._queue.put(chunk)
+
+    def start(self, sample_rate, target_sample_rate=None):
+        """开始上传
+
+        Args:
+            sample_rate: 实际录音采样率
+            target_sample_rate: 上传的采样率，为空时按录音采样率上传
+        """
+        self.sample_rate = target_sample_rate or sample_rate
+        if self.sample_rate != sample_rate:
+            self._resampler = StreamingResampler(
+                PolyphaseResampler(sample_rate, self.sample_rate)
+            )
+        threading.Thread(target=tracer.wrap(self._upload), daemon=True).start()
+
+    def cancel(self):
+        """取消上传（如录音过短）"""
+        self._cancelled = True
+        if self.deadline is not None:
+            self.deadline.cancel()
+        self._queue.put(None)
+
+    def finish(self, timeout):
+        """结束音频输入并等待服务端响应
+
+        截止时间从松开按键时开始计算；剩余的音频块发送前会检查截止时间，
+        请求体发完后读取超时收紧到剩余时间，超时后上传线程会自行结束并释放连接。
+
+        Returns:
+            httpx.Response: 服务端响应
+        """
+        if self.deadline is not None:
+            self.deadline.set(timeout)
+        self._queue.put(None)
+        if not self._done.wait(timeout):
+            self.cancel()
+            raise TimeoutError(f"操作超时 ({timeout}秒)")
+        if self._error is not None:
+            raise self._error
+        return self._response
+
+    def _wav_header(self):
+        """生成长度未知的 16 位单声道 WAV 头"""
+        byte_rate = self.sample_rate * 2
+        return (
+            b"RIFF"
+            + struct.pack("<I", self.STREAMING_SIZE)
+            + b"WAVEfmt "
+            + struct.pack("<IHHIIHH", 16, 1, 1, self.sample_rate, byte_rate, 2, 16)
+            + b"data"
+            + struct.pack("<I", self.STREAMING_SIZE)
+        )
+
+    def _body(self):
+        """multipart 请求体生成器，逐块产出已编码的音频"""
+        for name, value in self.fields.items():
+            yield (
+                f"--{self._boundary}\r\n"
+                f'Content-Disposition: form-data; name="{name}"\r\n\r\n'
+                f"{value}\r\n"
+            ).encode()
+        yield (
+            f"--{self._boundary}\r\n"
+            f'Content-Disposition: form-data; name="file"; filename="{self.filename}"\r\n'
+            "Content-Type: audio/wav\r\n\r\n"
+        ).encode()
+        yield self._wav_header()
+
+        while True:
+            chunks = [self._queue.get()]
+            # 合并已积压的小块，减少分块数量
+            while chunks[-1] is not None and not self._queue.empty():
+                chunks.append(self._queue.get_nowait())
+            finished = chunks[-1] is None
+            if self._cancelled:
+                raise RuntimeError("上传已取消")
+            self.deadline.check()
+            pcm = [c for c in chunks if c is not None]
+            audio = np.zeros(0, np.float32)
+            if pcm:
+                audio = np.concatenate(pcm)
+                audio = audio.reshape(len(audio), -1).mean(axis=1)
+            if self._resampler is not None:
+                audio = self._resampler(audio)
+                if finished:
+                    audio = np.concatenate((audio, self._resampler.flush()))
+            if len(audio):
+                data = to_int16(audio).astype("<i2").tobytes()
+                self.bytes_sent += len(data)
+                yield data
+            if finished:
+                break
+
+        yield f"\r\n--{self._boundary}--\r\n".encode()
+        self.deadline.body_sent()
+
+    def _upload(self):
+        try:
+            # 录音期间不设总截止时间，读写单步超时仍然生效；
+            # 松开按键后由 finish() 设置截止时间，请求体发完时读取超时收紧到剩余时间
+            with request_tracker.track("流式上传") as deadline:
+                self.deadline = deadline
+                self._response = self.client.post(
+                    self.url,
+                    content=self._body(),
+                    headers={
+                        "Content-Type": f"multipart/form-data; boundary={self._boundary}"
+                    },
+                    timeout=deadline.httpx_timeout(self.timeout),
+                )
+        except Exception as e:
+            if not self._cancelled:
+                logger.warning(f"流式上传失败: {e}")
+            self._error = e
+        finally:
+            self._done.set()
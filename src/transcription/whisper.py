@@ -1,72 +1,62 @@
 import os
-import threading
 import time
-from functools import wraps
 
 import dotenv
-import httpx
-from openai import OpenAI
-from opencc import OpenCC
+from openai import DefaultHttpxClient, OpenAI
 
+from ..llm.local_punctuation import LocalPunctuator
+from ..llm.planner import PostProcessPlanner
 from ..llm.symbol import SymbolProcessor
+from .cache import TranscriptionCache
+from ..utils.chinese_convert import get_converter
+from ..utils.deadline import request_tracker
 from ..utils.logger import logger
+from ..utils.tracing import tracer
 
 dotenv.load_dotenv()
 
 
-def timeout_decorator(seconds):
-    def decorator(func):
-        @wraps(func)
-        def wrapper(*args, **kwargs):
-            result = [None]
-            error = [None]
-            completed = threading.Event()
-
-            def target():
-                try:
-                    result[0] = func(*args, **kwargs)
-                except Exception as e:
-                    error[0] = e
-                finally:
-                    completed.set()
-
-            thread = threading.Thread(target=target)
-            thread.daemon = True
-            thread.start()
-
-            if completed.wait(seconds):
-                if error[0] is not None:
-                    raise error[0]
-                return result[0]
-            raise TimeoutError(f"操作超时 ({seconds}秒)")
-
-        return wrapper
-
-    return decorator
-
-
 class WhisperProcessor:
     # 类级别的配置参数
-    DEFAULT_TIMEOUT = 20  # API 超时时间（秒）
+    DEFAULT_TIMEOUT = 10  # API 超时时间（秒）
     DEFAULT_MODEL = None
 
-    def __init__(self):
+    def __init__(self, service_platform=None):
         api_key = os.getenv("GROQ_API_KEY")
         base_url = os.getenv("GROQ_BASE_URL")
         self.convert_to_simplified = (
             os.getenv("CONVERT_TO_SIMPLIFIED", "false").lower() == "true"
         )
-        self.cc = OpenCC("t2s") if self.convert_to_simplified else None
+        self.cc = get_converter("t2s") if self.convert_to_simplified else None
         self.symbol = SymbolProcessor()
         self.add_symbol = os.getenv("ADD_SYMBOL", "false").lower() == "true"
         self.optimize_result = os.getenv("OPTIMIZE_RESULT", "false").lower() == "true"
+        # 流式输出：模型边生成边输入，不必等完整结果
+        self.stream_llm = os.getenv("LLM_STREAM", "false").lower() == "true"
+        # 启用多个模型后处理步骤时合并为一次调用
+        self.combine_llm = os.getenv("LLM_COMBINE_STEPS", "true").lower() == "true"
+        self.planner = PostProcessPlanner(self.symbol.client, self.symbol.model)
+        # 短句先用本地规则添加标点，没有把握时才调用模型
+        self.local_punctuator = (
+            LocalPunctuator()
+            if os.getenv("LOCAL_PUNCTUATION", "false").lower() == "true"
+            else None
+        )
         self.timeout_seconds = self.DEFAULT_TIMEOUT
-        self.service_platform = os.getenv("SERVICE_PLATFORM", "groq").lower()
+        self.cache = TranscriptionCache()
+        self.service_platform = (
+            service_platform or os.getenv("SERVICE_PLATFORM", "groq")
+        ).lower()
 
         if self.service_platform == "groq":
             assert api_key, "未设置 GROQ_API_KEY 环境变量"
             self.client = OpenAI(
-                api_key=api_key, base_url=base_url if base_url else None
+                api_key=api_key,
+                base_url=base_url if base_url else None,
+                # 请求体发送完毕后按剩余时间收紧读取超时
+                http_client=DefaultHttpxClient(
+                    event_hooks={"request": [request_tracker.bind_request]}
+                ),
             )
             self.DEFAULT_MODEL = "whisper-large-v3-turbo"
         elif self.service_platform == "siliconflow":
@@ -79,27 +69,98 @@ class WhisperProcessor:
         """将繁体中文转换为简体中文"""
         if not self.convert_to_simplified or not text:
             return text
-        return self.cc.convert(text)
+        with tracer.span("opencc"):
+            return self.cc.convert(text)
 
-    @timeout_decorator(10)
     def _call_whisper_api(self, mode, audio_data, prompt):
         """调用 Whisper API"""
-        if mode == "translations":
-            response = self.client.audio.translations.create(
-                model="whisper-large-v3",
-                response_format="text",
-                prompt=prompt,
-                file=("audio.wav", audio_data),
-            )
-        else:  # transcriptions
-            response = self.client.audio.transcriptions.create(
-                model="whisper-large-v3-turbo",
-                response_format="text",
-                prompt=prompt,
-                file=("audio.wav", audio_data),
+        filename = getattr(audio_data, "name", "audio.wav")
+        with request_tracker.track("Whisper 转录", self.timeout_seconds) as deadline:
+            # 超时交给 SDK 内部的 httpx 处理，超时即断开连接；不重试以免超出截止时间。
+            # 上传的文件经过包装，对冲请求落败或超时后在读取下一块时中止上传
+            client = self.client.with_options(
+                timeout=deadline.httpx_timeout(), max_retries=0
             )
+            if mode == "translations":
+                response = client.audio.translations.create(
+                    model="whisper-large-v3",
+                    response_format="text",
+                    prompt=prompt,
+                    file=(filename, deadline.wrap(audio_data)),
+                )
+            else:  # transcriptions
+                response = client.audio.transcriptions.create(
+                    model="whisper-large-v3-turbo",
+                    response_format="text",
+                    prompt=prompt,
+                    file=(filename, deadline.wrap(audio_data)),
+                )
         return str(response).strip()
 
+    def transcribe(self, audio_buffer, mode="transcriptions", prompt=""):
+        """调用 API 获取原始识别文本（不做后处理），相同音频命中缓存时不再请求"""
+        return self.cache.get_or_transcribe(
+            audio_buffer,
+            mode,
+            self.DEFAULT_MODEL,
+            prompt,
+            lambda: self._call_whisper_api(mode, audio_buffer, prompt),
+        )
+
+    def post_process(self, result, mode):
+        """对识别结果做后处理（繁简转换、标点、优化）
+
+        启用多个模型步骤时合并为一次调用；启用流式输出时最后一次模型调用
+        返回 StreamingText：请求在当前线程发起，键盘输入时逐块消费。
+        """
+        result = self._convert_traditional_to_simplified(result)
+        logger.info(f"识别结果: {result}")
+
+        steps = []
+        # 仅在 groq API 时添加标点符号
+        if self.service_platform == "groq" and self.add_symbol:
+            local = (
+                self.local_punctuator.try_punctuate(result)
+                if self.local_punctuator and result
+                else None
+            )
+            if local is not None:
+                result = local
+                logger.info(f"添加标点符号: {result}")
+            else:
+                steps.append("punctuate")
+        if self.optimize_result:
+            steps.append("optimize")
+        if self.combine_llm and len(steps) > 1:
+            try:
+                if self.stream_llm:
+                    # 合并输出中途失败时改为逐步处理（不再流式），在流的后台线程中完成
+                    return self.planner.stream(
+                        result,
+                        steps,
+                        recover=lambda: self._run_steps(result, steps, stream=False),
+                    )
+                result = self.planner.run(result, steps)
+                logger.info(f"合并后处理结果: {result}")
+                return result
+            except Exception as e:
+                logger.warning(f"合并后处理失败，改为逐步处理: {e}")
+        return self._run_steps(result, steps, self.stream_llm)
+
+    def _run_steps(self, result, steps, stream):
+        """逐步调用模型完成后处理，stream 为 True 时最后一步返回 StreamingText"""
+        if "punctuate" in steps:
+            if stream and "optimize" not in steps:
+                return self.symbol.add_symbol_stream(result)
+            result = self.symbol.add_symbol(result)
+            logger.info(f"添加标点符号: {result}")
+        if "optimize" in steps:
+            if stream:
+                return self.symbol.optimize_result_stream(result)
+            result = self.symbol.optimize_result(result)
+            logger.info(f"优化结果: {result}")
+        return result
+
     def process_audio(self, audio_buffer, mode="transcriptions", prompt=""):
         """调用 Whisper API 处理音频（转录或翻译）
 
@@ -117,27 +178,17 @@ class WhisperProcessor:
             start_time = time.time()
 
             logger.info(f"正在调用 Whisper API... (模式: {mode})")
-            result = self._call_whisper_api(mode, audio_buffer, prompt)
+            result = self.transcribe(audio_buffer, mode, prompt)
 
             logger.info(
                 f"API 调用成功 ({mode}), 耗时: {time.time() - start_time:.1f}秒"
             )
-            result = self._convert_traditional_to_simplified(result)
-            logger.info(f"识别结果: {result}")
-
-            # 仅在 groq API 时添加标点符号
-            if self.service_platform == "groq" and self.add_symbol:
-                result = self.symbol.add_symbol(result)
-                logger.info(f"添加标点符号: {result}")
-            if self.optimize_result:
-                result = self.symbol.optimize_result(result)
-                logger.info(f"优化结果: {result}")
-
-            return result, None
+            return self.post_process(result, mode), None
 
         except TimeoutError:
             error_msg = f"❌ API 请求超时 ({self.timeout_seconds}秒)"
             logger.error(error_msg)
+            request_tracker.log_stats()
             return None, error_msg
         except Exception as e:
             error_msg = f"❌ {str(e)}"
@@ -0,0 +1,164 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from .logger import logger
+
+
+class LRUCache:
+    """线程安全的内存 LRU 缓存"""
+
+    def __init__(self, max_items=256):
+        self.max_items = max_items
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._data:
+                return None
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_items:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+
+class SQLiteStore:
+    """SQLite 磁盘缓存，总大小超过上限时按最近访问时间淘汰"""
+
+    def __init__(self, path, table, max_bytes):
+        self.table = table
+        self.max_bytes = max_bytes
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, "
+                "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+
+    def get(self, key):
+        """返回 (值, 写入时间)，不存在时返回 None"""
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT value, created_at FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None:
+                with self._conn:
+                    self._conn.execute(
+                        f"UPDATE {self.table} SET accessed_at = ? WHERE key = ?",
+                        (time.time(), key),
+                    )
+            return row
+
+    def set(self, key, value):
+        now = time.time()
+        size = len(key) + len(value.encode("utf-8"))
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} VALUES (?, ?, ?, ?, ?)",
+                (key, value, size, now, now),
+            )
+            self._evict()
+
+    def delete(self, key):
+        with self._lock, self._conn:
+            self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+
+    def _evict(self):
+        total = self._conn.execute(
+            f"SELECT COALESCE(SUM(size), 0) FROM {self.table}"
+        ).fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # 从最久未访问的记录开始删除，直到总大小回到上限以内
+        rows = self._conn.execute(
+            f"SELECT key, size FROM {self.table} ORDER BY accessed_at"
+        ).fetchall()
+        evicted = []
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            evicted.append((key,))
+            total -= size
+        self._conn.executemany(f"DELETE FROM {self.table} WHERE key = ?", evicted)
+
+
+class PersistentCache:
+    """内存 LRU + 可选 SQLite 磁盘存储的两级缓存，记录命中/未命中次数"""
+
+    def __init__(
+        self,
+        table,
+        label,
+        max_items=256,
+        db_path=None,
+        max_bytes=50 * 1024 * 1024,
+        ttl=None,
+    ):
+        """
+        Args:
+            table: SQLite 表名
+            label: 日志中显示的缓存名称
+            max_items: 内存中最多保留的条目数
+            db_path: SQLite 文件路径，为空时只使用内存缓存
+            max_bytes: 磁盘缓存总大小上限（字节）
+            ttl: 条目自写入起的有效期（秒），为空时永不过期
+        """
+        self.label = label
+        self.ttl = ttl
+        self.memory = LRUCache(max_items)
+        self.store = SQLiteStore(db_path, table, max_bytes) if db_path else None
+        self.hits = 0
+        self.misses = 0
+        self._stats_lock = threading.Lock()  # 计数在多个处理线程中更新
+
+    def get(self, key):
+        # 内存中保存 (值, 写入时间)，与磁盘记录一致，便于判断是否过期
+        entry = self.memory.get(key)
+        if entry is None and self.store is not None:
+            entry = self.store.get(key)
+            if entry is not None:
+                self.memory.set(key, tuple(entry))
+        if entry is not None and self.ttl and time.time() - entry[1] > self.ttl:
+            self.delete(key)
+            entry = None
+        with self._stats_lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return entry[0]
+
+    def set(self, key, value):
+        self.memory.set(key, (value, time.time()))
+        if self.store is not None:
+            self.store.set(key, value)
+
+    def delete(self, key):
+        self.memory.delete(key)
+        if self.store is not None:
+            self.store.delete(key)
+
+    def log_stats(self, hit):
+        with self._stats_lock:
+            hits, misses = self.hits, self.misses
+        logger.info(
+            f"{self.label}{'命中' if hit else '未命中'} "
+            f"(累计命中 {hits}, 未命中 {misses})"
+        )
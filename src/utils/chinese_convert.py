@@ -0,0 +1,115 @@
+import json
+import os
+import re
+import threading
+
+from .logger import logger
+
+
+class ChineseConverter:
+    """基于 OpenCC 词典的简繁转换
+
+    opencc-python-reimplemented 逐段在字典中查找最长匹配，长文本较慢。这里在首次使用时
+    把配置中的词典预编译一次：词组合并为一个按长度降序的正则（匹配最长词组），
+    单字编译为 str.translate 的映射表，转换在 C 层完成。文本中不含任何会被改写的字时
+    （例如识别结果本来就是简体）直接返回，只需一次集合判断。
+    """
+
+    def __init__(self, conversion="t2s"):
+        self.conversion = conversion
+        self.steps = None  # [(词组正则, 词组映射, 单字映射表)]，首次使用时构建
+        self.triggers = None  # 所有会被改写的字，文本与其不相交时无需转换
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _package_dir():
+        import opencc
+
+        return os.path.dirname(opencc.__file__)
+
+    def _load_dict(self, spec):
+        """读取配置中的一个词典（txt 或 group），返回 {原文: 译文}"""
+        if spec["type"] == "group":
+            mapping = {}
+            # 组内靠前的词典优先
+            for child in reversed(spec["dicts"]):
+                mapping.update(self._load_dict(child))
+            return mapping
+        mapping = {}
+        path = os.path.join(self._package_dir(), "dictionary", spec["file"])
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                parts = line.rstrip("\n").split("\t")
+                if len(parts) == 2 and parts[0]:
+                    # 一对多时取第一个候选，与 OpenCC 一致
+                    mapping[parts[0]] = parts[1].split(" ")[0]
+        return mapping
+
+    def _build(self):
+        path = os.path.join(self._package_dir(), "config", f"{self.conversion}.json")
+        with open(path, encoding="utf-8") as f:
+            config = json.load(f)
+        steps = []
+        triggers = set()
+        for step in config["conversion_chain"]:
+            mapping = self._load_dict(step["dict"])
+            phrases = {k: v for k, v in mapping.items() if len(k) > 1}
+            chars = {ord(k): v for k, v in mapping.items() if len(k) == 1}
+            pattern = None
+            if phrases:
+                # 先用首字的字符类过滤，只有可能匹配的位置才尝试各个词组
+                heads = "".join(sorted({re.escape(k[0]) for k in phrases}))
+                alternatives = "|".join(
+                    re.escape(k) for k in sorted(phrases, key=len, reverse=True)
+                )
+                pattern = re.compile(f"((?=[{heads}])(?:{alternatives}))")
+            for k, v in mapping.items():
+                triggers.update(self._changed_chars(k, v))
+            steps.append((pattern, phrases, chars))
+        return steps, frozenset(triggers)
+
+    @staticmethod
+    def _changed_chars(source, target):
+        """词条中会被改写的字；文本不含其中任何字时，该词条不会改变文本"""
+        if len(source) != len(target):
+            return set(source)
+        return {a for a, b in zip(source, target) if a != b}
+
+    def _ensure_built(self):
+        if self.steps is not None:
+            return
+        with self._lock:
+            if self.steps is None:
+                steps, self.triggers = self._build()
+                self.steps = steps
+                logger.info(f"简繁转换词典已加载 ({self.conversion})")
+
+    def needs_conversion(self, text):
+        self._ensure_built()
+        return not self.triggers.isdisjoint(text)
+
+    def convert(self, text):
+        if not text or not self.needs_conversion(text):
+            return text
+        for pattern, phrases, chars in self.steps:
+            if pattern is None:
+                text = text.translate(chars)
+                continue
+            # split 后奇数位置是匹配到的词组，整体替换且不再做单字转换
+            parts = pattern.split(text)
+            for i, part in enumerate(parts):
+                parts[i] = phrases[part] if i % 2 else part.translate(chars)
+            text = "".join(parts)
+        return text
+
+
+_converters = {}
+_converters_lock = threading.Lock()
+
+
+def get_converter(conversion="t2s"):
+    """按转换类型共享的转换器，词典在第一次转换时加载"""
+    with _converters_lock:
+        if conversion not in _converters:
+            _converters[conversion] = ChineseConverter(conversion)
+        return _converters[conversion]
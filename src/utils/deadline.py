@@ -0,0 +1,201 @@
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+
+import httpx
+import openai
+
+from .logger import logger
+from .tracing import tracer
+
+
+class Deadline:
+    """单个请求的截止时间
+
+    把剩余时间换算成 HTTP 客户端自身的超时参数，超时由客户端在请求线程内抛出，
+    连接随之释放，不需要额外的看门狗线程。
+    """
+
+    def __init__(self, seconds=None, cancel_event=None):
+        self.seconds = seconds
+        self.expires_at = None
+        self.cancel_event = cancel_event  # 外部取消信号（如对冲请求中落败的一方）
+        self._cancelled = False
+        self._timeouts = None  # 请求实际使用的 httpx 超时参数
+        if seconds is not None:
+            self.set(seconds)
+
+    @property
+    def cancelled(self):
+        return self._cancelled or (
+            self.cancel_event is not None and self.cancel_event.is_set()
+        )
+
+    def set(self, seconds):
+        """从现在起 seconds 秒后到期"""
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self):
+        """剩余秒数，未设置截止时间时返回 None"""
+        if self.expires_at is None:
+            return None
+        return max(self.expires_at - time.monotonic(), 0.001)
+
+    def httpx_timeout(self, default=None):
+        """按剩余时间生成 httpx 超时参数
+
+        httpx 的超时按阶段、按每次读写计算，并不是整个请求的总时长：上传由 wrap()
+        包装的文件对象限定，响应读取则在请求体发送完毕后由 body_sent() 收紧。
+
+        Args:
+            default: 尚未设置截止时间时使用的单步超时
+        """
+        if self.expires_at is None:
+            return httpx.Timeout(default)
+        return httpx.Timeout(self.remaining())
+
+    def bind(self, request):
+        """记下请求实际使用的超时参数（httpx 在发出请求时才生成）"""
+        self._timeouts = request.extensions.get("timeout")
+
+    def body_sent(self):
+        """请求体已发送完毕，把读取超时收紧到剩余时间"""
+        if self._timeouts is not None and self.expires_at is not None:
+            self._timeouts["read"] = self.remaining()
+
+    def cancel(self):
+        """标记请求已取消，上传中的请求体会在读取下一块时中止"""
+        self._cancelled = True
+
+    def check(self):
+        """已取消或已超时则抛出异常"""
+        if self.cancelled:
+            raise RuntimeError("请求已取消")
+        if self.expires_at is not None and time.monotonic() > self.expires_at:
+            raise TimeoutError(f"操作超时 ({self.seconds}秒)")
+
+    def wrap(self, fileobj):
+        """包装上传的文件对象，每次读取前检查是否已取消或超时"""
+        return _CheckedReader(fileobj, self)
+
+
+class _CheckedReader:
+    """读取前检查截止时间的文件对象包装"""
+
+    def __init__(self, fileobj, deadline):
+        self._fileobj = fileobj
+        self._deadline = deadline
+
+    def read(self, *args):
+        self._deadline.check()
+        chunk = self._fileobj.read(*args)
+        if not chunk:
+            self._deadline.body_sent()
+        return chunk
+
+    def __getattr__(self, name):
+        return getattr(self._fileobj, name)
+
+
+class RequestTracker:
+    """统计进行中、已超时以及超过截止时间仍未返回（被放弃）的请求"""
+
+    ABANDON_GRACE = 2  # 超过截止时间多少秒仍未返回视为被放弃
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ids = itertools.count()
+        self._in_flight = {}
+        self.completed = 0
+        self.timed_out = 0
+        self.cancelled = 0
+        self._local = threading.local()
+
+    @contextmanager
+    def cancel_scope(self, event):
+        """在当前线程内发起的请求都关联到 event，event 被设置时这些请求中止上传"""
+        self._local.cancel_event = event
+        try:
+            yield
+        finally:
+            self._local.cancel_event = None
+
+    @contextmanager
+    def track(self, name, seconds=None):
+        """跟踪一次请求
+
+        Args:
+            name: 请求名称，用于日志
+            seconds: 截止时长；为 None 时可稍后通过 deadline.set() 设置
+
+        Yields:
+            Deadline: 用于生成客户端超时参数
+        """
+        deadline = Deadline(seconds, getattr(self._local, "cancel_event", None))
+        outer = getattr(self._local, "deadline", None)
+        self._local.deadline = deadline
+        request_id = next(self._ids)
+        with self._lock:
+            self._in_flight[request_id] = (name, deadline)
+        tracer.event("request_sent", request=name)
+        try:
+            yield deadline
+        except (httpx.TimeoutException, openai.APITimeoutError) as e:
+            with self._lock:
+                self.timed_out += 1
+            tracer.event("request_timeout", request=name)
+            raise TimeoutError(f"{name} 超时 ({deadline.seconds}秒)") from e
+        except TimeoutError:
+            with self._lock:
+                self.timed_out += 1
+            tracer.event("request_timeout", request=name)
+            raise
+        except Exception:
+            if deadline.cancelled:
+                with self._lock:
+                    self.cancelled += 1
+            tracer.event("request_failed", request=name)
+            raise
+        else:
+            with self._lock:
+                self.completed += 1
+            tracer.event("response_received", request=name)
+        finally:
+            self._local.deadline = outer
+            with self._lock:
+                del self._in_flight[request_id]
+
+    def bind_request(self, request):
+        """httpx 的 request 事件钩子：把请求关联到当前线程正在跟踪的截止时间"""
+        deadline = getattr(self._local, "deadline", None)
+        if deadline is not None:
+            deadline.bind(request)
+
+    def stats(self):
+        """返回请求统计"""
+        now = time.monotonic()
+        with self._lock:
+            abandoned = sum(
+                1
+                for _, deadline in self._in_flight.values()
+                if deadline.expires_at is not None
+                and now > deadline.expires_at + self.ABANDON_GRACE
+            )
+            return {
+                "in_flight": len(self._in_flight),
+                "abandoned": abandoned,
+                "completed": self.completed,
+                "timed_out": self.timed_out,
+                "cancelled": self.cancelled,
+            }
+
+    def log_stats(self):
+        logger.info(
+            "请求统计: 进行中 {in_flight}, 被放弃 {abandoned}, 完成 {completed}, "
+            "超时 {timed_out}, 取消 {cancelled}".format(**self.stats())
+        )
+
+
+request_tracker = RequestTracker()
@@ -0,0 +1,85 @@
+import json
+import os
+import socket
+import threading
+import time
+
+from .logger import logger
+
+
+class StatusChannel:
+    """状态通道：录音、转录等状态的显示方式
+
+    inline 模式（默认）下状态文字会粘贴到当前输入框、稍后再删除；socket 模式下
+    状态以 JSON 通过本机 UDP 发送给订阅方（如 main_tkui.py 的状态浮窗），
+    不占用剪贴板、不产生按键，输入框中只出现最终文本。
+    """
+
+    HOST = "127.0.0.1"
+    PORT = 50517
+
+    def __init__(self):
+        self.mode = os.getenv("STATUS_MODE", "inline").lower()
+        if self.mode not in ("inline", "socket"):
+            logger.warning(f"未知的 STATUS_MODE: {self.mode}，使用 inline")
+            self.mode = "inline"
+        self.address = (self.HOST, int(os.getenv("STATUS_PORT", self.PORT)))
+        self._socket = None
+        if self.mode == "socket":
+            self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            self._socket.setblocking(False)
+            logger.info(f"状态通过 UDP 发送到 {self.address[0]}:{self.address[1]}")
+
+    @property
+    def inline(self):
+        return self.mode == "inline"
+
+    def publish(self, state, message):
+        """发送状态，没有订阅方时直接丢弃"""
+        if self._socket is None:
+            return
+        payload = json.dumps(
+            {"state": state, "message": message, "time": time.time()},
+            ensure_ascii=False,
+        ).encode("utf-8")
+        try:
+            self._socket.sendto(payload, self.address)
+        except OSError:
+            pass
+
+
+class StatusSubscriber:
+    """在后台线程接收状态，对每条状态调用 callback(dict)"""
+
+    def __init__(self, callback, port=None):
+        self.callback = callback
+        self.port = int(port or os.getenv("STATUS_PORT", StatusChannel.PORT))
+        self._socket = None
+        self._running = False
+
+    def start(self):
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._socket.bind((StatusChannel.HOST, self.port))
+        # 定时醒来检查是否已停止
+        self._socket.settimeout(0.5)
+        self._running = True
+        threading.Thread(target=self._receive, daemon=True).start()
+        return self
+
+    def _receive(self):
+        try:
+            while self._running:
+                try:
+                    data, _ = self._socket.recvfrom(4096)
+                except socket.timeout:
+                    continue
+                try:
+                    self.callback(json.loads(data.decode("utf-8")))
+                except Exception as e:
+                    logger.warning(f"处理状态消息失败: {e}")
+        finally:
+            self._socket.close()
+
+    def stop(self):
+        """停止接收，套接字在接收线程退出时关闭"""
+        self._running = False
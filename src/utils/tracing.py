@@ -0,0 +1,248 @@
+import itertools
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+from .logger import logger
+
+
+class Trace:
+    """一段录音从按键到输入完成的事件与耗时"""
+
+    def __init__(self, trace_id, **attrs):
+        self.id = trace_id
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        self.attrs = attrs
+        self.events = []  # [(名称, 距开始的秒数, 属性)]
+        self.spans = []  # [(名称, 距开始的秒数, 持续秒数, 属性)]
+        self.finished = False
+        self._lock = threading.Lock()
+
+    def offset(self):
+        return time.perf_counter() - self._start
+
+    def add_event(self, name, attrs):
+        with self._lock:
+            self.events.append((name, self.offset(), attrs))
+
+    def add_span(self, name, start, duration, attrs):
+        with self._lock:
+            self.spans.append((name, start, duration, attrs))
+
+    def event_offset(self, name):
+        """某事件第一次出现的时间（秒），没有则返回 None"""
+        for event_name, offset, _ in self.events:
+            if event_name == name:
+                return offset
+        return None
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "started_at": self.started_at,
+            "attrs": self.attrs,
+            "events": [
+                {"name": name, "ms": round(offset * 1000, 2), **attrs}
+                for name, offset, attrs in self.events
+            ],
+            "spans": [
+                {
+                    "name": name,
+                    "start_ms": round(start * 1000, 2),
+                    "duration_ms": round(duration * 1000, 2),
+                    **attrs,
+                }
+                for name, start, duration, attrs in self.spans
+            ],
+        }
+
+
+class JsonlSink:
+    """每段录音一行 JSON"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def write(self, trace):
+        line = json.dumps(trace.to_dict(), ensure_ascii=False)
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+
+class PrometheusSink:
+    """Prometheus textfile 格式的直方图，每段录音结束后整体重写文件
+
+    供 node_exporter 的 textfile collector 采集。
+    """
+
+    BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self.histograms = {
+            "whisper_input_event_seconds": defaultdict(self._histogram),
+            "whisper_input_span_seconds": defaultdict(self._histogram),
+            "whisper_input_release_to_paste_seconds": defaultdict(self._histogram),
+        }
+        self.utterances = defaultdict(int)
+
+    def _histogram(self):
+        return {"buckets": [0] * len(self.BUCKETS), "sum": 0.0, "count": 0}
+
+    def _observe(self, metric, label, value):
+        histogram = self.histograms[metric][label]
+        for i, upper in enumerate(self.BUCKETS):
+            if value <= upper:
+                histogram["buckets"][i] += 1
+        histogram["sum"] += value
+        histogram["count"] += 1
+
+    def write(self, trace):
+        with self._lock:
+            self.utterances[trace.attrs.get("status", "ok")] += 1
+            for name, offset, _ in trace.events:
+                self._observe("whisper_input_event_seconds", ("event", name), offset)
+            for name, _, duration, _ in trace.spans:
+                self._observe("whisper_input_span_seconds", ("span", name), duration)
+            released = trace.event_offset("key_release")
+            pasted = trace.event_offset("paste_complete")
+            if released is not None and pasted is not None:
+                self._observe("whisper_input_release_to_paste_seconds", None, pasted - released)
+            self._flush()
+
+    def _flush(self):
+        lines = [
+            "# HELP whisper_input_utterances_total 已处理的录音数",
+            "# TYPE whisper_input_utterances_total counter",
+        ]
+        for status, count in sorted(self.utterances.items()):
+            lines.append(f'whisper_input_utterances_total{{status="{status}"}} {count}')
+        for metric, series in self.histograms.items():
+            lines.append(f"# TYPE {metric} histogram")
+            for label, histogram in sorted(series.items(), key=lambda item: str(item[0])):
+                base = f'{label[0]}="{label[1]}",' if label else ""
+                for upper, count in zip(self.BUCKETS, histogram["buckets"]):
+                    lines.append(f'{metric}_bucket{{{base}le="{upper}"}} {count}')
+                lines.append(f'{metric}_bucket{{{base}le="+Inf"}} {histogram["count"]}')
+                suffix = f"{{{base.rstrip(',')}}}" if base else ""
+                lines.append(f"{metric}_sum{suffix} {histogram['sum']:.6f}")
+                lines.append(f"{metric}_count{suffix} {histogram['count']}")
+        # 先写临时文件再替换，采集方不会读到写了一半的文件
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp_path, self.path)
+
+
+class Tracer:
+    """进程内的轻量追踪器
+
+    按下按键达到阈值时 begin() 开始一段录音的追踪，此后录音、转录、输入各环节
+    通过 event()/span() 记录时间点和耗时；录音结束后 detach() 取出该追踪，
+    在处理线程中 activate() 后继续记录，finish() 时写入输出端。
+    未配置 TRACE_SINK 时所有调用都是空操作。
+    """
+
+    SINKS = {
+        "jsonl": (JsonlSink, "logs/traces.jsonl"),
+        "prometheus": (PrometheusSink, "logs/whisper_input.prom"),
+    }
+
+    def __init__(self, sink=None):
+        self.sink = sink if sink is not None else self._sink_from_env()
+        self.current = None  # 正在录音的追踪
+        self._local = threading.local()
+        self._ids = itertools.count(1)
+
+    def _sink_from_env(self):
+        name = os.getenv("TRACE_SINK", "").lower()
+        if name not in self.SINKS:
+            if name and name != "none":
+                logger.warning(f"未知的 TRACE_SINK: {name}，不记录追踪")
+            return None
+        sink_class, default_path = self.SINKS[name]
+        path = os.getenv("TRACE_PATH") or default_path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        logger.info(f"追踪输出: {name} -> {path}")
+        return sink_class(path)
+
+    @property
+    def enabled(self):
+        return self.sink is not None
+
+    def active(self):
+        """当前线程激活的追踪；没有时归属正在录音的追踪"""
+        return getattr(self._local, "trace", None) or self.current
+
+    def begin(self, **attrs):
+        """开始一段录音的追踪"""
+        if not self.enabled:
+            return None
+        self.current = Trace(next(self._ids), **attrs)
+        return self.current
+
+    def detach(self):
+        """取出正在录音的追踪，之后的事件需在 activate() 中记录"""
+        trace, self.current = self.current, None
+        return trace
+
+    @contextmanager
+    def activate(self, trace):
+        """在当前线程内把事件记录到 trace"""
+        previous = getattr(self._local, "trace", None)
+        self._local.trace = trace
+        try:
+            yield trace
+        finally:
+            self._local.trace = previous
+
+    def wrap(self, func):
+        """让 func 在其它线程中执行时沿用调用方的追踪"""
+        trace = self.active()
+        if trace is None:
+            return func
+
+        def traced(*args, **kwargs):
+            with self.activate(trace):
+                return func(*args, **kwargs)
+
+        return traced
+
+    def event(self, name, **attrs):
+        trace = self.active()
+        if trace is not None:
+            trace.add_event(name, attrs)
+
+    @contextmanager
+    def span(self, name, **attrs):
+        trace = self.active()
+        if trace is None:
+            yield
+            return
+        start = trace.offset()
+        try:
+            yield
+        finally:
+            trace.add_span(name, start, trace.offset() - start, attrs)
+
+    def finish(self, trace, **attrs):
+        """结束追踪并写入输出端"""
+        if trace is None or trace.finished:
+            return
+        trace.finished = True
+        trace.attrs.update(attrs)
+        try:
+            self.sink.write(trace)
+        except Exception as e:
+            logger.warning(f"写入追踪失败: {e}")
+
+
+tracer = Tracer()
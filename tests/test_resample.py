@@ -0,0 +1,84 @@
+"""PolyphaseResampler 的频谱测试：带内正弦的幅度与频率保持不变，带外信号被充分衰减"""
+
+import importlib.util
+import os
+
+import numpy as np
+import pytest
+
+# resample.py 只依赖 numpy；直接按路径加载，避免 src.audio 包导入录音模块（需要 PortAudio）
+_spec = importlib.util.spec_from_file_location(
+    "resample",
+    os.path.join(os.path.dirname(__file__), "..", "src", "audio", "resample.py"),
+)
+resample = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(resample)
+
+DST_RATE = 16000
+SECONDS = 1.0
+
+
+def tone(frequency, rate, amplitude=0.5):
+    t = np.arange(int(SECONDS * rate)) / rate
+    return (amplitude * np.sin(2 * np.pi * frequency * t)).astype(np.float32)
+
+
+def spectrum(audio, rate):
+    """去掉首尾滤波器暂态后的加窗幅度谱，幅度已按窗口增益归一化为正弦振幅"""
+    edge = len(audio) // 10
+    audio = audio[edge:-edge]
+    window = np.hanning(len(audio))
+    magnitude = np.abs(np.fft.rfft(audio * window)) * 2 / window.sum()
+    frequencies = np.fft.rfftfreq(len(audio), 1 / rate)
+    return frequencies, magnitude
+
+
+@pytest.mark.parametrize("src_rate", [44100, 48000])
+def test_output_length(src_rate):
+    audio = tone(1000, src_rate)
+    out = resample.PolyphaseResampler(src_rate, DST_RATE)(audio)
+    assert len(out) == -(-len(audio) * DST_RATE // src_rate)
+    assert out.dtype == np.float32
+
+
+@pytest.mark.parametrize("src_rate", [44100, 48000])
+@pytest.mark.parametrize("frequency", [200, 1000, 3000, 6000, 7000])
+def test_in_band_tone_preserved(src_rate, frequency):
+    out = resample.PolyphaseResampler(src_rate, DST_RATE)(tone(frequency, src_rate))
+    frequencies, magnitude = spectrum(out, DST_RATE)
+    peak = np.argmax(magnitude)
+    resolution = frequencies[1]
+    assert abs(frequencies[peak] - frequency) <= resolution
+    # 幅度误差小于 0.1 dB
+    assert 20 * np.log10(magnitude[peak] / 0.5) == pytest.approx(0, abs=0.1)
+
+
+@pytest.mark.parametrize("src_rate", [44100, 48000])
+@pytest.mark.parametrize("frequency", [10000, 12000, 15000, 20000])
+def test_out_of_band_tone_attenuated(src_rate, frequency):
+    """阻带内的信号不能折叠回带内
+
+    截止频率在目标 Nyquist（8kHz）处，过渡带约 7~9.5kHz，阻带衰减按设计约 80dB。
+    """
+    out = resample.PolyphaseResampler(src_rate, DST_RATE)(tone(frequency, src_rate))
+    _, magnitude = spectrum(out, DST_RATE)
+    attenuation = 20 * np.log10(magnitude.max() / 0.5)
+    assert attenuation < -75
+
+
+def test_same_rate_is_identity():
+    audio = tone(1000, DST_RATE)
+    np.testing.assert_array_equal(resample.PolyphaseResampler(DST_RATE, DST_RATE)(audio), audio)
+
+
+@pytest.mark.parametrize("src_rate", [44100, 48000])
+def test_streaming_matches_whole(src_rate):
+    """逐块重采样（块长不规则，含空块）拼接后与整段重采样一致"""
+    audio = np.random.default_rng(0).uniform(-0.5, 0.5, src_rate).astype(np.float32)
+    resampler = resample.PolyphaseResampler(src_rate, DST_RATE)
+    stream = resample.StreamingResampler(resampler)
+    bounds = [0, 0, 1, 7, 480, 481, 3000, 20000, len(audio)]
+    out = np.concatenate(
+        [stream(audio[a:b]) for a, b in zip(bounds, bounds[1:])] + [stream.flush()]
+    )
+    np.testing.assert_allclose(out, resampler(audio), atol=1e-6)